@@ -0,0 +1,10 @@
+"""
+Benchmark suite for the hot paths in src/
+
+Run it from the project root with ``python benchmarks/run.py``; see
+run.py for the options. Each case is timed over several repetitions and
+profiled once under tracemalloc, and results can be saved as a JSON
+baseline and compared against one to flag regressions. startup.py
+measures the import cost of the analytical modules in fresh
+interpreters and fails if any of them loads a plotting library.
+"""
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: list-rescan vs set-based cycle detection in generar_secuencia
+
+generar_secuencia splices starts n >= 2 from the trajectory memo, so the
+set-based loop is timed on its own here. The memo path is reported
+separately, with a fresh memo per range.
+"""
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.collatz_analyzer import CollatzInvestigator
+from src.core.trajectory_memo import TrajectoryMemo
+
+
+def generar_secuencia_reescaneo(investigator, n, max_pasos=1000):
+    """Previous implementation: rescans the list on every step"""
+    secuencia = [n]
+    actual = n
+
+    for _ in range(max_pasos):
+        actual = investigator.collatz(actual)
+        secuencia.append(actual)
+
+        if actual == 1:
+            break
+
+        if actual in secuencia[:-1]:
+            break
+
+    return secuencia
+
+
+def generar_secuencia_conjunto(investigator, n, max_pasos=1000):
+    """Set-based cycle detection, without the memo"""
+    secuencia = [n]
+    vistos = {n}
+    actual = n
+
+    for _ in range(max_pasos):
+        actual = investigator.collatz(actual)
+        secuencia.append(actual)
+
+        if actual == 1:
+            break
+
+        if actual in vistos:
+            break
+        vistos.add(actual)
+
+    return secuencia
+
+
+def inicios_muestreo(max_range, muestra):
+    """Starting values visited by identificar_embudos"""
+    inicios = []
+    for clase in range(1, 16, 2):
+        for i in range(muestra // 8):
+            n = clase + 16 * (i % (max_range // 16))
+            if n <= max_range:
+                inicios.append(n)
+    return inicios
+
+
+def medir(funcion, inicios):
+    inicio = time.perf_counter()
+    secuencias = [funcion(n) for n in inicios]
+    return time.perf_counter() - inicio, secuencias
+
+
+def main():
+    investigator = CollatzInvestigator(memo=TrajectoryMemo())
+
+    # Negative starts enter real cycles, so every path must stop identically
+    for n in (-1, -5, -17, 0):
+        esperada = generar_secuencia_reescaneo(investigator, n)
+        assert generar_secuencia_conjunto(investigator, n) == esperada
+        assert investigator.generar_secuencia(n) == esperada
+
+    # (max_range, muestra) pairs used by ejemplo_uso and verificacion_rapida
+    for max_range, muestra in [(100000, 5000), (50000, 1000), (1000000, 20000)]:
+        inicios = inicios_muestreo(max_range, muestra)
+
+        t_lista, esperadas = medir(
+            lambda n: generar_secuencia_reescaneo(investigator, n), inicios)
+        t_set, obtenidas = medir(
+            lambda n: generar_secuencia_conjunto(investigator, n), inicios)
+        assert esperadas == obtenidas, "set-based detection changed the output"
+
+        # A fresh memo per range, so no range starts from a warm cache
+        investigator.memo = TrajectoryMemo()
+        t_memo, obtenidas = medir(investigator.generar_secuencia, inicios)
+        assert esperadas == obtenidas, "memo splicing changed the output"
+
+        print(f"max_range={max_range:>8} muestra={muestra:>6}: "
+              f"rescan {t_lista:.3f}s, set {t_set:.3f}s "
+              f"(x{t_lista / t_set:.1f}), "
+              f"generar_secuencia with fresh memo {t_memo:.3f}s "
+              f"(x{t_lista / t_memo:.1f})")
+
+
+if __name__ == "__main__":
+    main()
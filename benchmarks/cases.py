@@ -0,0 +1,220 @@
+"""
+Benchmark cases for the hot paths in src/
+"""
+
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from src.core.bigint import BigWalker, available_backends
+from src.core.batch_engine import BatchTrajectoryEngine
+from src.core.collatz_analyzer import CollatzInvestigator
+from src.core.collatz_maps import VARIANTS
+from src.core.descent_check import check_descent_block
+from src.core.collatz_graph import CollatzGraph
+from src.core.factorization import Factorizer
+from src.core.fractal_detector import FractalDetector
+from src.core.funnel_accumulator import FunnelAccumulator
+from src.core.modular_stats import ModularStats
+from src.core.range_sweep import RangeSweep
+from src.core.results_store import ResultsStore
+from src.core.trajectory_memo import TrajectoryMemo
+from src.funnel_identifier import FunnelIdentifier
+
+from .harness import Case, scratch_directory
+
+
+def sampling_starts(max_range, muestra):
+    """Starting values visited by identificar_embudos"""
+    inicios = []
+    for clase in range(1, 16, 2):
+        for i in range(muestra // 8):
+            n = clase + 16 * (i % (max_range // 16))
+            if n <= max_range:
+                inicios.append(n)
+    return inicios
+
+
+@lru_cache(maxsize=None)
+def _embudos(max_range, muestra):
+    investigator = CollatzInvestigator(memo=TrajectoryMemo())
+    return investigator.identificar_embudos(max_range, muestra)
+
+
+@lru_cache(maxsize=None)
+def _sequence_funnels(cantidad):
+    identifier = FunnelIdentifier(memo=TrajectoryMemo())
+    funnels = []
+    for n in sampling_starts(10 * cantidad, cantidad):
+        funnels.extend(identifier.stream_sequence_funnels(n))
+    return funnels
+
+
+@lru_cache(maxsize=None)
+def _sequences(cantidad):
+    investigator = CollatzInvestigator(memo=TrajectoryMemo())
+    return [investigator.generar_secuencia(n) for n in sampling_starts(10 * cantidad, cantidad)]
+
+
+def _funnel_like_values(cantidad):
+    # Funnel peaks are even local maxima spread over many magnitudes
+    rng = np.random.default_rng(0)
+    return (rng.integers(1, 10**12, cantidad, dtype=np.int64) * 2).tolist()
+
+
+def _funnel_occurrences(cantidad):
+    # One shard's worth of peak occurrences, as accumulate_modular_class
+    # hands them to the accumulator
+    resultado = BatchTrajectoryEngine().run_flat(np.arange(1, 2 * cantidad, 2, dtype=np.uint64))
+    valores = resultado['values']
+    crecimientos = valores.astype(np.float64) / ((valores - 1) // 3).astype(np.float64)
+    return (valores, resultado['positions'], crecimientos,
+            resultado['steps'][resultado['lanes']] + 1)
+
+
+def _reduce_funnels(ocurrencias):
+    acumulador = FunnelAccumulator(details_cap=5)
+    acumulador.add_batch(*ocurrencias)
+    return acumulador.columns()
+
+
+def _graph_neighbourhood(limite):
+    # What plot_tree_neighbourhood prepares before drawing
+    grafo = CollatzGraph(limite)
+    return grafo.to_networkx(grafo.ancestors(16, max_nodes=300))
+
+
+def _modular_tables(valores):
+    # What the modular distribution and symmetry plots compute
+    stats = ModularStats(valores)
+    return stats.histograms((2, 16, 2**10, 2**20)), stats.exemplars(16)
+
+
+def _results_directory(cantidad):
+    # A census-sized results directory, written once per measured size and
+    # removed with the harness's scratch directory
+    directorio = os.path.join(scratch_directory(), 'embudos')
+    if not os.path.exists(directorio):
+        valores = _funnel_like_values(cantidad)
+        ResultsStore.write(directorio, dict(zip(valores, range(cantidad, 0, -1))))
+    return directorio
+
+
+def _load_results(directorio):
+    # What the visualization scripts do: open the store, reduce the values
+    return ModularStats(ResultsStore(directorio).values).histogram(16)
+
+
+def _big_starts(bits, cantidad=20):
+    rng = np.random.default_rng(bits)
+    return [int.from_bytes(rng.bytes(bits // 8), 'little') | (1 << (bits - 1)) | 1
+            for _ in range(cantidad)]
+
+
+def _stepwise_summary(n):
+    # The one-step-at-a-time walk big starts went through before BigWalker
+    pasos, pico = 0, n
+    while n != 1:
+        n = n // 2 if n % 2 == 0 else 3 * n + 1
+        pasos += 1
+        if n > pico:
+            pico = n
+    return pasos, pico
+
+
+def _fresh_investigator():
+    return CollatzInvestigator(memo=TrajectoryMemo())
+
+
+def _fresh_identifier():
+    return FunnelIdentifier(memo=TrajectoryMemo())
+
+
+# Bit lengths of the starts for the big-integer walks
+_BIG_BITS = {'small': 256, 'medium': 2048, 'large': 8192}
+
+CASES = [
+    Case('generar_secuencia',
+         lambda muestra: (_fresh_investigator(), sampling_starts(100000, muestra)),
+         lambda s: [s[0].generar_secuencia(n) for n in s[1]],
+         {'small': 2000, 'medium': 20000, 'large': 100000}),
+
+    Case('identificar_embudos',
+         lambda p: (_fresh_investigator(), p),
+         lambda s: s[0].identificar_embudos(*s[1]),
+         {'small': (50000, 1000), 'medium': (100000, 5000), 'large': (1000000, 20000)}),
+
+    Case('analizar_conectividad',
+         lambda p: (_fresh_investigator(), _embudos(*p)),
+         lambda s: s[0].analizar_conectividad(s[1]),
+         {'small': (50000, 1000), 'medium': (100000, 5000), 'large': (1000000, 20000)}),
+
+    Case('identify_funnels_advanced',
+         lambda p: (_fresh_identifier(), p),
+         lambda s: s[0].identify_funnels_advanced(*s[1]),
+         {'small': (50000, 1000), 'medium': (100000, 2000), 'large': (1000000, 8000)}),
+
+    Case('funnel_accumulator',
+         _funnel_occurrences,
+         _reduce_funnels,
+         {'small': 5000, 'medium': 20000, 'large': 100000}),
+
+    Case('consolidate_funnels',
+         lambda cantidad: (_fresh_identifier(), _sequence_funnels(cantidad)),
+         lambda s: s[0].consolidate_funnels(s[1]),
+         {'small': 1000, 'medium': 10000, 'large': 50000}),
+
+    Case('factorize',
+         _funnel_like_values,
+         lambda valores: Factorizer().factorize_many(valores),
+         {'small': 1000, 'medium': 10000, 'large': 50000}),
+
+    Case('detectar_autosimilitud',
+         lambda cantidad: (FractalDetector(), _sequences(cantidad)),
+         lambda s: s[0].detectar_autosimilitud(s[1], niveles=3),
+         {'small': 1000, 'medium': 10000, 'large': 50000}),
+
+    Case('modular_stats',
+         lambda cantidad: np.array(_funnel_like_values(cantidad), dtype=np.uint64),
+         _modular_tables,
+         {'small': 10000, 'medium': 1000000, 'large': 5000000}),
+
+    Case('graph_store',
+         lambda limite: limite,
+         _graph_neighbourhood,
+         {'small': 100000, 'medium': 1000000, 'large': 5000000}),
+
+    Case('load_results',
+         _results_directory,
+         _load_results,
+         {'small': 10000, 'medium': 1000000, 'large': 5000000}),
+
+    Case('range_sweep',
+         lambda N: (RangeSweep(), N),
+         lambda s: s[0].run(s[1]),
+         {'small': 100000, 'medium': 1000000, 'large': 10000000}),
+
+    Case('descent_check',
+         lambda tamano: (10**9, 10**9 + tamano - 1),
+         lambda bloque: check_descent_block(*bloque),
+         {'small': 100000, 'medium': 1000000, 'large': 10000000}),
+
+    Case('big_walk_stepwise',
+         _big_starts,
+         lambda starts: [_stepwise_summary(n) for n in starts],
+         _BIG_BITS),
+] + [
+    Case(f'big_walk_{backend}',
+         lambda bits, backend=backend: (BigWalker(backend), _big_starts(bits)),
+         lambda s: [s[0].summary(n) for n in s[1]],
+         _BIG_BITS)
+    for backend in available_backends()
+] + [
+    # Same results in standard steps; only the map the lanes advance with differs
+    Case(f'batch_map_{variant}',
+         lambda cantidad: np.arange(1, 2 * cantidad, 2, dtype=np.uint64),
+         lambda inicios, variant=variant: BatchTrajectoryEngine(variant=variant).run_flat(inicios),
+         {'small': 10000, 'medium': 100000, 'large': 1000000})
+    for variant in VARIANTS
+]
@@ -0,0 +1,147 @@
+"""
+Timing, memory profiling and baseline comparison for benchmark cases
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SIZES = ('small', 'medium', 'large')
+
+
+class Case:
+    """One hot path measured at several input sizes.
+
+    ``prepare(size)`` builds the untimed input (called again before every
+    repetition, so caches and memos start cold) and ``run(state)`` is the
+    timed call. ``sizes`` maps each size name to the value passed to
+    prepare.
+    """
+
+    def __init__(self, name, prepare, run, sizes):
+        self.name = name
+        self.prepare = prepare
+        self.run = run
+        self.sizes = sizes
+
+
+# Scratch directory of the case being measured (see scratch_directory)
+_directorio_temporal = None
+
+
+def scratch_directory():
+    """Directory for files a case prepares; measure removes it afterwards"""
+    if _directorio_temporal is None:
+        raise RuntimeError("scratch_directory() is only available while a case is measured")
+    return _directorio_temporal
+
+
+def measure(case, size, repeat=3):
+    """Median and best wall time over repeat runs plus peak traced memory"""
+    global _directorio_temporal
+    parametro = case.sizes[size]
+    tiempos = []
+
+    # The cases print progress; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()), \
+            tempfile.TemporaryDirectory(prefix='bench_') as directorio:
+        _directorio_temporal = directorio
+        try:
+            for _ in range(repeat):
+                estado = case.prepare(parametro)
+                inicio = time.perf_counter()
+                case.run(estado)
+                tiempos.append(time.perf_counter() - inicio)
+
+            estado = case.prepare(parametro)
+            tracemalloc.start()
+            try:
+                case.run(estado)
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        finally:
+            _directorio_temporal = None
+
+    return {
+        'parameter': parametro,
+        'time_median': statistics.median(tiempos),
+        'time_best': min(tiempos),
+        'peak_bytes': pico,
+        'repeat': repeat,
+    }
+
+
+def run_cases(cases, sizes=('small',), repeat=3, report=print):
+    """Measure every case at every size; keys are 'name[size]'"""
+    resultados = {}
+    for case in cases:
+        for size in sizes:
+            if size not in case.sizes:
+                continue
+            clave = f"{case.name}[{size}]"
+            resultados[clave] = measure(case, size, repeat)
+            r = resultados[clave]
+            report(f"   {clave:<45} {r['time_median'] * 1000:10.1f} ms "
+                   f"(best {r['time_best'] * 1000:.1f}) "
+                   f"peak {r['peak_bytes'] / 2**20:8.2f} MiB")
+    return resultados
+
+
+def save_baseline(resultados, path):
+    """Write results with enough context to judge later comparisons"""
+    directorio = os.path.dirname(path)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    datos = {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': resultados,
+    }
+    with open(path, 'w') as f:
+        json.dump(datos, f, indent=2)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(resultados, baseline, time_tolerance=0.25, memory_tolerance=0.25,
+            min_seconds=0.02):
+    """Cases slower or hungrier than the baseline beyond the tolerances
+
+    Timings below min_seconds in both runs are too noisy to judge and are
+    skipped for time (memory is still compared).
+    """
+    previos = baseline.get('results', baseline)
+    regresiones = []
+
+    for clave, actual in resultados.items():
+        if clave not in previos:
+            continue
+        previo = previos[clave]
+
+        if max(actual['time_median'], previo['time_median']) >= min_seconds:
+            razon = actual['time_median'] / max(previo['time_median'], 1e-9)
+            if razon > 1 + time_tolerance:
+                regresiones.append({'case': clave, 'metric': 'time_median',
+                                    'baseline': previo['time_median'],
+                                    'current': actual['time_median'], 'ratio': razon})
+
+        razon = actual['peak_bytes'] / max(previo['peak_bytes'], 1)
+        if razon > 1 + memory_tolerance and actual['peak_bytes'] - previo['peak_bytes'] > 2**20:
+            regresiones.append({'case': clave, 'metric': 'peak_bytes',
+                                'baseline': previo['peak_bytes'],
+                                'current': actual['peak_bytes'], 'ratio': razon})
+
+    return regresiones
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Run the benchmark suite and compare it against a JSON baseline
+
+    python benchmarks/run.py                      # small inputs, print only
+    python benchmarks/run.py --size small medium --save
+    python benchmarks/run.py --size medium --compare
+
+--save writes the results as the baseline; --compare exits with status 1
+when a case is slower or uses more memory than the baseline allows.
+"""
+import argparse
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks.cases import CASES
+from benchmarks.harness import SIZES, compare, load_baseline, run_cases, save_baseline
+
+DEFAULT_BASELINE = os.path.join(project_root, 'results', 'benchmarks', 'baseline.json')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', nargs='+', choices=SIZES, default=['small'])
+    parser.add_argument('--case', nargs='+', choices=[c.name for c in CASES],
+                        help="only run these cases")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help="store results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="flag regressions vs the baseline")
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    casos = [c for c in CASES if args.case is None or c.name in args.case]
+    print(f"⏱️  Benchmarking {len(casos)} cases at sizes {', '.join(args.size)}")
+    resultados = run_cases(casos, args.size, args.repeat)
+
+    estado = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; run with --save first")
+            return 2
+        regresiones = compare(resultados, load_baseline(args.baseline),
+                              args.time_tolerance, args.memory_tolerance)
+        for r in regresiones:
+            print(f"⚠️  Regression {r['case']} {r['metric']}: "
+                  f"{r['baseline']:.4g} -> {r['current']:.4g} (x{r['ratio']:.2f})")
+        if regresiones:
+            estado = 1
+        else:
+            print("✅ No regressions against the baseline")
+
+    if args.save:
+        save_baseline(resultados, args.baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+
+    return estado
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark: import cost of the analytical modules
+
+Each module is imported in a fresh interpreter (what every pool worker
+pays). The run fails when an analytical module pulls in a plotting or
+progress-bar library, and --compare flags import time regressions like
+run.py does.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks.harness import compare, load_baseline, save_baseline
+
+# Modules batch workers import; none of them may load HEAVY at import time
+ANALYTICAL_MODULES = [
+    'src.collatz_analyzer',
+    'src.core.collatz_analyzer',
+    'src.funnel_identifier',
+    'src.core.fractal_detector',
+    'src.core.census',
+    'src.visualization',
+]
+HEAVY = ('matplotlib', 'tqdm', 'pandas', 'networkx', 'scipy')
+
+DEFAULT_BASELINE = os.path.join(project_root, 'results', 'benchmarks', 'startup.json')
+
+_SONDA = """
+import sys, time, json
+inicio = time.perf_counter()
+import {module}
+transcurrido = time.perf_counter() - inicio
+pesados = sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy!r}))
+print(json.dumps({{'seconds': transcurrido, 'heavy': pesados}}))
+"""
+
+
+def measure_import(module, repeat=5):
+    """Median import time of module in fresh interpreters, and heavy modules it loaded"""
+    tiempos, pesados = [], set()
+    codigo = _SONDA.format(module=module, heavy=HEAVY)
+    for _ in range(repeat):
+        salida = subprocess.run([sys.executable, '-c', codigo], cwd=project_root,
+                                capture_output=True, text=True, check=True).stdout
+        datos = json.loads(salida.strip().splitlines()[-1])
+        tiempos.append(datos['seconds'])
+        pesados.update(datos['heavy'])
+    return statistics.median(tiempos), sorted(pesados)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    print(f"🚀 Import cost of {len(ANALYTICAL_MODULES)} analytical modules")
+    resultados, estado = {}, 0
+    for module in ANALYTICAL_MODULES:
+        segundos, pesados = measure_import(module, args.repeat)
+        resultados[f"import:{module}"] = {'time_median': segundos, 'time_best': segundos,
+                                          'peak_bytes': 0, 'repeat': args.repeat}
+        aviso = f"  ❌ loads {', '.join(pesados)}" if pesados else ""
+        print(f"   {module:<30} {segundos * 1000:8.1f} ms{aviso}")
+        if pesados:
+            estado = 1
+
+    if args.compare and os.path.exists(args.baseline):
+        for r in compare(resultados, load_baseline(args.baseline), args.time_tolerance,
+                         min_seconds=0.05):
+            print(f"⚠️  Regression {r['case']}: {r['baseline'] * 1000:.1f} ms -> "
+                  f"{r['current'] * 1000:.1f} ms (x{r['ratio']:.2f})")
+            estado = 1
+
+    if args.save:
+        save_baseline(resultados, args.baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+
+    return estado
+
+
+if __name__ == "__main__":
+    sys.exit(main())
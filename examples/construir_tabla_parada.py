@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Build (or extend) the stopping-time table used by the examples
+"""
+import argparse
+import os
+import sys
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.stopping_table import StoppingTable
+
+TABLA_PARADA = os.path.join(project_root, 'results', 'stopping_table.bin')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('max_n', type=float, nargs='?', default=1e6,
+                        help="cover every 1 <= n <= max_n (default 1e6, 12 bytes per n)")
+    parser.add_argument('--archivo', default=TABLA_PARADA)
+    parser.add_argument('--k', type=int, default=16, help="jump table size of the sweep")
+    args = parser.parse_args()
+
+    # An existing table only sweeps the values it does not store yet
+    if os.path.exists(args.archivo):
+        tabla = StoppingTable(args.archivo).extend(int(args.max_n), k=args.k)
+    else:
+        tabla = StoppingTable.build(args.archivo, int(args.max_n), k=args.k)
+    print(f"{args.archivo}: n = {tabla.first}..{tabla.last}")
@@ -10,13 +10,22 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
 from src.collatz_analyzer import CollatzInvestigator
+from src.core.instrumentation import PipelineStats
+from src.core.stopping_table import StoppingTable
+from src.core.trajectory_memo import get_shared_memo
 
-def verificacion_rapida():
+# identificar_embudos skips the starts whose precomputed max excursion rules out embudos
+# (build the table with examples/construir_tabla_parada.py)
+TABLA_PARADA = os.path.join(project_root, 'results', 'stopping_table.bin')
+if os.path.exists(TABLA_PARADA):
+    get_shared_memo().attach_table(StoppingTable(TABLA_PARADA))
+
+def verificacion_rapida(stats=None):
     """Quick verification of main findings"""
     print("🚀 Quick Verification of Collatz Fractal Structure")
     print("=" * 50)
     
-    investigator = CollatzInvestigator()
+    investigator = CollatzInvestigator(stats=stats)
     
     # Quick embudo identification
     embudos = investigator.identificar_embudos(max_range=50000, muestra=1000)
@@ -34,6 +43,15 @@ def verificacion_rapida():
     distribucion = investigator.analizar_distribucion_modular(embudos)
     
     print("\n✅ Quick verification complete!")
+    investigator.stats.report()
 
 if __name__ == "__main__":
-    verificacion_rapida()
\ No newline at end of file
+    # --stats prints counters and stage timings, --profile adds sampled hot lines
+    stats = None
+    if '--stats' in sys.argv or '--profile' in sys.argv:
+        stats = PipelineStats()
+        if '--profile' in sys.argv:
+            stats.start_profiler()
+    verificacion_rapida(stats)
+    if stats is not None:
+        stats.stop_profiler()
\ No newline at end of file
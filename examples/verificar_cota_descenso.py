@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Overnight check of the draft's 8(log2 n)^2 first-descent bound
+"""
+import argparse
+import os
+import sys
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.collatz_analyzer import CollatzInvestigator
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('max_n', type=float, help="check every 2 <= n <= max_n (e.g. 1e10)")
+    parser.add_argument('--archivo', default=os.path.join(project_root, 'results',
+                                                         'descent_bound.jsonl'))
+    parser.add_argument('--bloque', type=int, default=10_000_000)
+    parser.add_argument('--workers', type=int, default=None, help="default: one per CPU")
+    args = parser.parse_args()
+
+    # Rerunning with the same --archivo resumes after the last finished block
+    resumen = CollatzInvestigator().verificar_cota_descenso(
+        int(args.max_n), args.archivo, tamano_bloque=args.bloque, workers=args.workers)
+    sys.exit(1 if resumen['first_counterexample'] is not None else 0)
@@ -10,6 +10,14 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
 from src.collatz_analyzer import CollatzInvestigator
+from src.core.stopping_table import StoppingTable
+from src.core.trajectory_memo import get_shared_memo
+
+# identificar_embudos skips the starts whose precomputed max excursion rules out embudos
+# (build the table with examples/construir_tabla_parada.py)
+TABLA_PARADA = os.path.join(project_root, 'results', 'stopping_table.bin')
+if os.path.exists(TABLA_PARADA):
+    get_shared_memo().attach_table(StoppingTable(TABLA_PARADA))
 
 def verificacion_rapida():
     """Quick verification of main findings"""
@@ -0,0 +1,263 @@
+"""
+Vectorized batch trajectory engine for Collatz sampling
+"""
+
+import numpy as np
+
+from .bigint import get_big_walker
+from .collatz_maps import check_variant, map_step_array
+
+# Largest odd value whose 3n+1 successor still fits in uint64
+LIMITE_UINT64 = (2**64 - 2) // 3
+
+
+class BatchTrajectoryEngine:
+    """Advance many starting values in lockstep with NumPy arrays.
+
+    Every lane follows the same trajectory ``generar_secuencia`` would build
+    (stop at 1 or after ``max_steps``). Lanes whose next 3n+1 step would
+    overflow uint64 are handed over to exact Python ints automatically.
+    ``variant`` picks the map the lanes are advanced with ('C', 'T', 'T*'
+    or 'S', see collatz_maps); results are always reported in standard
+    steps and identical across variants, the shortcuts just take fewer
+    iterations.
+    """
+
+    def __init__(self, dtype=np.uint64, variant='C'):
+        self.dtype = dtype
+        self.variant = check_variant(variant)
+
+    def run(self, starts, max_steps=1000):
+        """Run all lanes and return steps, peaks and local maxima per lane"""
+        resultado = self.run_flat(starts, max_steps)
+        total = len(resultado['steps'])
+        cortes = np.searchsorted(resultado['lanes'], np.arange(total + 1))
+
+        return {
+            'steps': resultado['steps'],
+            'peaks': resultado['peaks'],
+            'maxima_positions': [resultado['positions'][cortes[i]:cortes[i + 1]]
+                                 for i in range(total)],
+            'maxima_values': [resultado['values'][cortes[i]:cortes[i + 1]]
+                              for i in range(total)],
+        }
+
+    def run_flat(self, starts, max_steps=1000):
+        """Run all lanes and return local maxima as flat lane-sorted arrays
+
+        Returns steps and peaks per lane plus 'lanes', 'positions' and
+        'values' arrays with one entry per local maximum, ordered by lane
+        and then by position. Avoids building one array per lane.
+        """
+        if isinstance(starts, np.ndarray) and starts.dtype.kind in 'iu':
+            if starts.size and starts.min() < 1:
+                raise ValueError("BatchTrajectoryEngine only handles positive starting values")
+            total = starts.size
+            fallback = {}
+            lanes = np.arange(total, dtype=np.int64)
+            actual = starts.astype(self.dtype)
+        else:
+            starts = [int(n) for n in starts]
+            total = len(starts)
+            if any(n < 1 for n in starts):
+                raise ValueError("BatchTrajectoryEngine only handles positive starting values")
+
+            # Values that do not even fit as a start go straight to exact ints
+            fallback = {lane: (n, n, 0, n) for lane, n in enumerate(starts) if n > 2**64 - 1}
+            lanes = np.array([lane for lane, n in enumerate(starts) if n <= 2**64 - 1],
+                             dtype=np.int64)
+            actual = np.array([starts[lane] for lane in lanes], dtype=self.dtype)
+
+        steps = np.zeros(total, dtype=np.int64)
+        peaks = np.zeros(total, dtype=self.dtype)
+        peaks[lanes] = actual
+
+        if self.variant == 'C':
+            avanzar = self._advance_standard
+        else:
+            avanzar = self._advance_map
+        lanes_max, posiciones_max, valores_max = avanzar(lanes, actual, steps, peaks,
+                                                         fallback, max_steps)
+
+        if lanes_max:
+            lanes_max = np.concatenate(lanes_max)
+            posiciones_max = np.concatenate(posiciones_max)
+            valores_max = np.concatenate(valores_max)
+        else:
+            lanes_max = np.zeros(0, dtype=np.int64)
+            posiciones_max = np.zeros(0, dtype=np.int64)
+            valores_max = np.zeros(0, dtype=self.dtype)
+
+        if fallback:
+            peaks = peaks.astype(object)
+            lanes_extra, posiciones_extra, valores_extra = [], [], []
+            for lane, estado in fallback.items():
+                pasos, top, posiciones, valores = self._run_exact(*estado, max_steps)
+                steps[lane] = pasos
+                peaks[lane] = top
+                lanes_extra.extend([lane] * len(posiciones))
+                posiciones_extra.extend(posiciones)
+                valores_extra.extend(valores)
+            lanes_max = np.concatenate([lanes_max, np.array(lanes_extra, dtype=np.int64)])
+            posiciones_max = np.concatenate(
+                [posiciones_max, np.array(posiciones_extra, dtype=np.int64)])
+            valores_max = np.array(valores_max.tolist() + valores_extra, dtype=object)
+
+        # Stable sort keeps the per-lane step order recorded above
+        orden = np.argsort(lanes_max, kind='stable')
+
+        return {
+            'steps': steps,
+            'peaks': peaks,
+            'lanes': lanes_max[orden],
+            'positions': posiciones_max[orden],
+            'values': valores_max[orden],
+        }
+
+    def _advance_standard(self, lanes, actual, steps, peaks, fallback, max_steps):
+        """Step every lane with C, detecting local maxima by comparison"""
+        anterior = actual.copy()
+        pico = actual.copy()
+        lanes_max, posiciones_max, valores_max = [], [], []
+
+        for paso in range(1, max_steps + 1):
+            if lanes.size == 0:
+                break
+
+            impares = (actual & 1).astype(bool)
+
+            # Hand over lanes whose 3n+1 would not fit in uint64
+            desborde = impares & (actual > LIMITE_UINT64)
+            if desborde.any():
+                for lane, prev, cur, top in zip(lanes[desborde].tolist(),
+                                                anterior[desborde].tolist(),
+                                                actual[desborde].tolist(),
+                                                pico[desborde].tolist()):
+                    fallback[lane] = (prev, cur, paso - 1, top)
+                seguir = ~desborde
+                lanes, actual, anterior, pico, impares = (
+                    lanes[seguir], actual[seguir], anterior[seguir],
+                    pico[seguir], impares[seguir])
+                if lanes.size == 0:
+                    break
+
+            siguiente = np.where(impares, 3 * actual + 1, actual >> 1)
+
+            # Position paso - 1 is a local maximum once its successor is known
+            if paso >= 2:
+                es_maximo = (actual > anterior) & (actual > siguiente)
+                if es_maximo.any():
+                    lanes_max.append(lanes[es_maximo])
+                    posiciones_max.append(np.full(int(es_maximo.sum()), paso - 1,
+                                                  dtype=np.int64))
+                    valores_max.append(actual[es_maximo])
+
+            np.maximum(pico, siguiente, out=pico)
+            anterior, actual = actual, siguiente
+            steps[lanes] = paso
+
+            terminadas = actual == 1
+            if terminadas.any():
+                peaks[lanes[terminadas]] = pico[terminadas]
+                seguir = ~terminadas
+                lanes, actual, anterior, pico = (
+                    lanes[seguir], actual[seguir], anterior[seguir], pico[seguir])
+
+        # Lanes cut off by max_steps keep their running peak
+        peaks[lanes] = pico
+        return lanes_max, posiciones_max, valores_max
+
+    def _advance_map(self, lanes, actual, steps, peaks, fallback, max_steps):
+        """Step every lane with the shortcut variant, reporting in C terms
+
+        Each variant step covers c_steps standard steps and passes at most
+        one odd value; its 3*odd + 1 is the only local maximum of the
+        standard trajectory inside the step, so positions, maxima and
+        peaks come out as the standard walk would give them.
+        """
+        uno = np.uint64(1)
+        posicion = np.zeros(lanes.size, dtype=np.int64)
+        pico = actual.copy()
+        lanes_max, posiciones_max, valores_max = [], [], []
+
+        while lanes.size:
+            # Hand over lanes whose 3*odd + 1 would not fit in uint64, before
+            # stepping: a wrapped image could be 0, which never turns odd
+            desborde = (actual & uno).astype(bool) & (actual > LIMITE_UINT64)
+            if self.variant == 'T*':
+                desborde |= ((actual & np.uint64(3)) == 2) & ((actual >> uno) > LIMITE_UINT64)
+            if desborde.any():
+                for lane, cur, paso, top in zip(lanes[desborde].tolist(),
+                                                actual[desborde].tolist(),
+                                                posicion[desborde].tolist(),
+                                                pico[desborde].tolist()):
+                    fallback[lane] = (cur, cur, paso, top)
+                seguir = ~desborde
+                lanes, actual, posicion, pico = (
+                    lanes[seguir], actual[seguir], posicion[seguir], pico[seguir])
+                if lanes.size == 0:
+                    break
+
+            siguiente, pasos, tiene_impar, impar = map_step_array(actual, self.variant)
+            if self.variant == 'T*':
+                # T*(2) = 4 jumps over 1; take the single C step instead
+                dos = actual == 2
+                siguiente[dos] = uno
+                pasos[dos] = 1
+                tiene_impar = tiene_impar & ~dos
+
+            # 3*odd + 1 sits one C step after the odd value (T* may pass n/2 first)
+            valor_pico = 3 * impar + uno
+            posicion_pico = posicion + 1
+            if self.variant == 'T*':
+                posicion_pico += impar != actual
+            es_maximo = tiene_impar & (posicion_pico < max_steps)
+            if es_maximo.any():
+                lanes_max.append(lanes[es_maximo])
+                posiciones_max.append(posicion_pico[es_maximo])
+                valores_max.append(valor_pico[es_maximo])
+            visto = tiene_impar & (posicion_pico <= max_steps)
+            np.maximum(pico, valor_pico, out=pico, where=visto)
+
+            posicion += pasos
+            actual = siguiente
+            terminadas = (actual == 1) | (posicion >= max_steps)
+            if terminadas.any():
+                steps[lanes[terminadas]] = np.minimum(posicion[terminadas], max_steps)
+                peaks[lanes[terminadas]] = pico[terminadas]
+                seguir = ~terminadas
+                lanes, actual, posicion, pico = (
+                    lanes[seguir], actual[seguir], posicion[seguir], pico[seguir])
+
+        return lanes_max, posiciones_max, valores_max
+
+    def maxima_above(self, starts, factor, max_steps=1000):
+        """Flat array of local maxima greater than factor * start, lane by lane"""
+        resultado = self.run_flat(starts, max_steps)
+        valores = resultado['values']
+        if factor == 0:
+            return valores
+        inicios = np.asarray(starts)[resultado['lanes']]
+
+        if valores.dtype == object or inicios.dtype == object:
+            mascara = np.array([int(v) > factor * int(n) for v, n in zip(valores, inicios)],
+                               dtype=bool)
+        else:
+            # v > factor * n  <=>  (v - 1) // factor >= n, without overflowing
+            inicios = inicios.astype(np.uint64)
+            mascara = (valores - 1) // np.uint64(factor) >= inicios
+        return valores[mascara]
+
+    def _run_exact(self, anterior, actual, paso, pico, max_steps):
+        """Finish one lane with big integers from the given state
+
+        actual is odd, at position 0 or already reported as a maximum, so
+        BigPeakWalk can take over from it.
+        """
+        posiciones, valores = [], []
+        recorrido = get_big_walker().peaks(actual, max_steps - paso)
+        for valor, posicion, _ in recorrido:
+            posiciones.append(paso + posicion)
+            valores.append(valor)
+
+        return paso + recorrido.length - 1, max(pico, recorrido.peak), posiciones, valores
@@ -0,0 +1,141 @@
+"""
+Big-integer Collatz walks, with gmpy2 mpz when it is installed
+"""
+
+try:
+    import gmpy2
+except ImportError:  # optional dependency
+    gmpy2 = None
+
+BACKENDS = ('python', 'gmpy2')
+
+# Starts above this leave the uint64 engines and plain steppers for BigWalker
+UMBRAL_GRANDE = 2**64 - 1
+
+
+def available_backends():
+    return [b for b in BACKENDS if b != 'gmpy2' or gmpy2 is not None]
+
+
+def _ctz_python(x):
+    """Trailing zero bits of x > 0 (the lowest set bit, isolated by x & -x)"""
+    return (x & -x).bit_length() - 1
+
+
+class BigWalker:
+    """Collatz trajectories of arbitrarily large values.
+
+    Each iteration does one 3x+1 and then strips the whole run of factors
+    of 2 with a single shift, using a count-trailing-zeros primitive:
+    ``gmpy2.bit_scan1`` on ``mpz`` values with backend='gmpy2', or
+    ``(x & -x).bit_length()`` on Python ints with backend='python'.
+    backend=None picks gmpy2 when it is installed. Results are plain ints
+    and match the step-by-step walk exactly.
+    """
+
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = 'gmpy2' if gmpy2 is not None else 'python'
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown big-integer backend: {backend}")
+        if backend == 'gmpy2' and gmpy2 is None:
+            raise ValueError("backend 'gmpy2' needs the gmpy2 package")
+
+        self.backend = backend
+        if backend == 'gmpy2':
+            self.convert = gmpy2.mpz
+            self.ctz = gmpy2.bit_scan1
+        else:
+            self.convert = int
+            self.ctz = _ctz_python
+
+    def descend(self, n, limite=2):
+        """(steps, peak, value) of n's walk until it first reaches an odd value below limite
+
+        The peak includes n. With the default limite the walk ends at 1, so
+        steps is the total stopping time.
+        """
+        if n < 1:
+            raise ValueError("BigWalker only handles positive values")
+        ctz = self.ctz
+        x = self.convert(n)
+        pico = x
+
+        pasos = ctz(x)
+        x >>= pasos
+        while x >= limite:
+            x = 3 * x + 1
+            if x > pico:
+                pico = x
+            k = ctz(x)
+            x >>= k
+            pasos += k + 1
+        return pasos, int(pico), int(x)
+
+    def summary(self, n):
+        """(steps_to_1, max_so_far), like TrajectoryMemo.resolve"""
+        pasos, pico, _ = self.descend(n)
+        return pasos, pico
+
+    def peaks(self, n, max_steps=1000):
+        """BigPeakWalk over n's local maxima"""
+        return BigPeakWalk(self, n, max_steps)
+
+
+class BigPeakWalk:
+    """Local maxima of a big trajectory, as PeakStream would yield them.
+
+    Every 3x+1 value is a local maximum (it exceeds x and its half), so the
+    maxima are read off the odd steps without visiting the halvings.
+    Yields ``(value, position, previous)``; ``length`` and ``peak`` (the
+    largest value up to position max_steps, start included) are set once
+    the iteration is over.
+    """
+
+    def __init__(self, walker, n, max_steps=1000):
+        self.walker = walker
+        self.n = n
+        self.max_steps = max_steps
+        self.length = None
+        self.peak = None
+
+    def __iter__(self):
+        ctz = self.walker.ctz
+        tope = self.max_steps
+        x = self.walker.convert(self.n)
+        pico = x
+
+        # Leading halvings of an even start
+        k = ctz(x)
+        posicion = min(k, tope)
+        x >>= k
+
+        while posicion < tope and not (posicion >= 1 and x == 1):
+            siguiente = 3 * x + 1
+            if siguiente > pico:
+                pico = siguiente
+            posicion += 1
+            if posicion >= tope:
+                break
+            yield int(siguiente), posicion, int(x)
+
+            k = ctz(siguiente)
+            if posicion + k > tope:
+                posicion = tope
+                break
+            x = siguiente >> k
+            posicion += k
+
+        self.length = posicion + 1
+        self.peak = int(pico)
+
+
+_walker = None
+
+
+def get_big_walker():
+    """Process-wide BigWalker on the fastest available backend"""
+    global _walker
+    if _walker is None:
+        _walker = BigWalker()
+    return _walker
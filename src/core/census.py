@@ -0,0 +1,207 @@
+"""
+Chunked, resumable funnel census over full ranges
+"""
+
+import json
+import os
+
+import numpy as np
+
+from .batch_engine import BatchTrajectoryEngine
+from .parallel import map_shards
+
+MODES = ('exhaustive', 'uniform', 'stratified')
+
+# Parameters that must match for chunk files to be reused
+_CAMPOS_MANIFIESTO = ('chunk_size', 'mode', 'samples_per_chunk', 'seed',
+                      'factor', 'max_steps')
+
+
+class FunnelCensus:
+    """Count significant local maxima over every odd start up to max_n.
+
+    The range is cut into chunks of ``chunk_size`` integers. Each chunk's
+    funnel counter (sorted values and counts) is written to its own
+    ``chunk_XXXXXX.npz`` file as soon as it is done, so an interrupted run
+    resumes by skipping finished chunks, and chunks can be spread over a
+    process pool. ``mode`` selects which odd starts of a chunk are walked:
+    'exhaustive' takes all of them, 'uniform' draws ``samples_per_chunk``
+    at random and 'stratified' draws ``samples_per_chunk // 8`` from each
+    odd class mod 16. A maximum counts when it exceeds ``factor`` times
+    its start, like identificar_embudos. ``variant`` is the map the
+    batch engine advances with; it changes the speed, not the counts, so
+    chunks written with any variant can be mixed. Rerunning with a larger
+    max_n reuses every finished chunk and only walks the new range (and
+    the old last chunk, when it was partial).
+    """
+
+    def __init__(self, max_n, directory, chunk_size=1_000_000, mode='exhaustive',
+                 samples_per_chunk=None, seed=0, factor=10, max_steps=1000,
+                 variant='C'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown census mode: {mode}")
+        if mode != 'exhaustive' and not samples_per_chunk:
+            raise ValueError(f"mode '{mode}' needs samples_per_chunk")
+
+        self.max_n = max_n
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.mode = mode
+        self.samples_per_chunk = samples_per_chunk
+        self.seed = seed
+        self.factor = factor
+        self.max_steps = max_steps
+        self.variant = variant
+
+    @property
+    def chunk_count(self):
+        return -(-self.max_n // self.chunk_size)
+
+    def chunk_bounds(self, index):
+        """Inclusive (lo, hi) range covered by a chunk"""
+        lo = index * self.chunk_size + 1
+        return lo, min((index + 1) * self.chunk_size, self.max_n)
+
+    def chunk_path(self, index):
+        return os.path.join(self.directory, f"chunk_{index:06d}.npz")
+
+    def chunk_starts(self, index):
+        """Odd starting values walked for a chunk, in increasing order"""
+        lo, hi = self.chunk_bounds(index)
+        impares = np.arange(lo | 1, hi + 1, 2, dtype=np.uint64)
+        if self.mode == 'exhaustive':
+            return impares
+
+        # Seeded per chunk so resumed and parallel runs draw the same starts
+        rng = np.random.default_rng([self.seed, index])
+        if self.mode == 'uniform':
+            elegidos = self._draw(rng, impares, self.samples_per_chunk)
+        else:
+            por_clase = self.samples_per_chunk // 8
+            elegidos = np.concatenate([
+                self._draw(rng, impares[impares % 16 == clase], por_clase)
+                for clase in range(1, 16, 2)])
+        return np.sort(elegidos)
+
+    def _draw(self, rng, valores, cantidad):
+        if cantidad >= valores.size:
+            return valores
+        return rng.choice(valores, size=cantidad, replace=False)
+
+    def is_chunk_done(self, index):
+        """True when the chunk file exists and covers the current bounds"""
+        ruta = self.chunk_path(index)
+        if not os.path.exists(ruta):
+            return False
+        with np.load(ruta, allow_pickle=True) as datos:
+            return int(datos['hi']) == self.chunk_bounds(index)[1]
+
+    def process_chunk(self, index):
+        """Walk one chunk and write its funnel counter to disk"""
+        lo, hi = self.chunk_bounds(index)
+        inicios = self.chunk_starts(index)
+        motor = BatchTrajectoryEngine(variant=self.variant)
+        valores = motor.maxima_above(inicios, self.factor, self.max_steps)
+        valores, cuentas = np.unique(valores, return_counts=True)
+
+        # Write then rename, so a killed worker never leaves a half file
+        temporal = self.chunk_path(index) + '.tmp.npz'
+        np.savez(temporal, values=valores, counts=cuentas.astype(np.int64),
+                 lo=lo, hi=hi, starts=inicios.size)
+        os.replace(temporal, self.chunk_path(index))
+        return index, inicios.size
+
+    def pending_chunks(self):
+        """Indices of the chunks still to walk for the current bounds"""
+        return [i for i in range(self.chunk_count) if not self.is_chunk_done(i)]
+
+    def run(self, workers=1):
+        """Process every pending chunk; finished chunks are skipped"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._check_manifest()
+        self._write_manifest()
+
+        pendientes = self.pending_chunks()
+        print(f"🔍 Funnel census 1-{self.max_n} ({self.mode}): "
+              f"{len(pendientes)}/{self.chunk_count} chunks pending")
+
+        tareas = [(self, i) for i in pendientes]
+        for index, caminados in map_shards(_process_census_chunk, tareas, workers):
+            print(f"   Chunk {index}: {caminados} starts")
+
+        return self
+
+    def merge(self, lote=32):
+        """Merge the finished chunk counters into (values, counts) sorted by value
+
+        Chunks a partial or interrupted run has not written yet (or whose
+        file only covers an older, shorter last chunk) are left out, and
+        the gap is reported.
+        """
+        valores = np.zeros(0, dtype=np.uint64)
+        cuentas = np.zeros(0, dtype=np.int64)
+        pendientes_v, pendientes_c = [valores], [cuentas]
+
+        faltantes = set(self.pending_chunks())
+        if faltantes:
+            primero = self.chunk_bounds(min(faltantes))
+            print(f"⚠️ Census merge: {len(faltantes)}/{self.chunk_count} chunks not finished "
+                  f"(first gap {primero[0]}-{primero[1]}); counts cover the rest only")
+
+        for index in range(self.chunk_count):
+            if index in faltantes:
+                continue
+            with np.load(self.chunk_path(index), allow_pickle=True) as datos:
+                pendientes_v.append(datos['values'])
+                pendientes_c.append(datos['counts'])
+            if len(pendientes_v) > lote:
+                valores, cuentas = _reduce(pendientes_v, pendientes_c)
+                pendientes_v, pendientes_c = [valores], [cuentas]
+
+        return _reduce(pendientes_v, pendientes_c)
+
+    def embudos(self, top=24, min_frequency=1):
+        """Merged census as an embudo -> frequency dict, most frequent first"""
+        valores, cuentas = self.merge()
+        mascara = cuentas >= min_frequency
+        valores, cuentas = valores[mascara], cuentas[mascara]
+        orden = np.argsort(-cuentas, kind='stable')
+        if top is not None:
+            orden = orden[:top]
+        return {int(valores[i]): int(cuentas[i]) for i in orden}
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, 'census.json')
+
+    def _check_manifest(self):
+        """Refuse to mix chunk files written with different parameters"""
+        if not os.path.exists(self._manifest_path()):
+            return
+        with open(self._manifest_path()) as f:
+            previo = json.load(f)
+        distintos = [c for c in _CAMPOS_MANIFIESTO if previo.get(c) != getattr(self, c)]
+        if distintos:
+            raise ValueError(f"Census in {self.directory} was run with different "
+                             f"parameters: {', '.join(distintos)}")
+
+    def _write_manifest(self):
+        manifiesto = {c: getattr(self, c) for c in _CAMPOS_MANIFIESTO}
+        manifiesto['max_n'] = self.max_n
+        with open(self._manifest_path(), 'w') as f:
+            json.dump(manifiesto, f, indent=2)
+
+
+def _reduce(valores, cuentas):
+    """Sum counts of equal values across several (values, counts) pairs"""
+    valores = np.concatenate(valores)
+    cuentas = np.concatenate(cuentas)
+    unicos, inverso = np.unique(valores, return_inverse=True)
+    total = np.zeros(unicos.size, dtype=np.int64)
+    np.add.at(total, inverso, cuentas)
+    return unicos, total
+
+
+def _process_census_chunk(tarea):
+    """Process-pool entry point for one census chunk"""
+    censo, index = tarea
+    return censo.process_chunk(index)
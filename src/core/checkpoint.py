@@ -0,0 +1,70 @@
+"""
+Periodic checkpoints for resumable, extensible sampling runs
+"""
+
+import os
+import pickle
+import time
+
+
+class SamplingCheckpoint:
+    """Merged state and per-class sampling cursors of one run, kept in a file.
+
+    Sampling runs walk sample indices 0, 1, ... of each odd residue class.
+    After every merged shard the run calls ``advance`` with the class, the
+    shard's end index and the merged state; the file is rewritten at most
+    every ``interval`` seconds, and once more by ``save`` at the end. A
+    rerun with the same path loads the cursors and only samples indices
+    past them, so it resumes after a crash and, with a larger sample
+    count, only walks the new indices. ``params`` (max_range and the
+    like) must match the file's; the sample count may only grow.
+    """
+
+    def __init__(self, path, params, interval=30.0):
+        self.path = path
+        self.params = params
+        self.interval = interval
+        self.cursors = {}
+        self.state = None
+        self._guardado = time.monotonic()
+
+    def load(self):
+        """Restore cursors and state; False when there is nothing to resume"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'rb') as f:
+            datos = pickle.load(f)
+        distintos = [k for k in self.params if datos['params'].get(k) != self.params[k]]
+        if distintos:
+            raise ValueError(f"Checkpoint {self.path} was written with different "
+                             f"parameters: {', '.join(distintos)}")
+        self.cursors = datos['cursors']
+        self.state = datos['state']
+        return True
+
+    def check_samples(self, muestras_por_clase):
+        """Refuse to shrink a run: the stored state already covers more samples"""
+        mayor = max(self.cursors.values(), default=0)
+        if mayor > muestras_por_clase:
+            raise ValueError(f"Checkpoint {self.path} already covers {mayor} samples per "
+                             f"class, more than the {muestras_por_clase} requested")
+
+    def advance(self, clase, fin, state):
+        """Record that class samples below fin are merged into state"""
+        self.cursors[clase] = fin
+        self.state = state
+        if time.monotonic() - self._guardado >= self.interval:
+            self.save()
+
+    def save(self):
+        directorio = os.path.dirname(self.path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        datos = {'params': self.params, 'cursors': self.cursors, 'state': self.state}
+
+        # Write then rename, so a run killed mid-save keeps the previous file
+        temporal = self.path + '.tmp'
+        with open(temporal, 'wb') as f:
+            pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, self.path)
+        self._guardado = time.monotonic()
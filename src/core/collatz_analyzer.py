@@ -2,16 +2,47 @@
 Main Collatz analyzer for fractal structure research
 """
 
+import os
+import shutil
+
 import numpy as np
-import matplotlib.pyplot as plt
-from collections import defaultdict, Counter
+from collections import defaultdict
 import json
-from tqdm import tqdm
+
+if __package__ in (None, ""):
+    # Run directly as a script: resolve the relative imports from the project root
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    __package__ = "src.core"
+
+from .batch_engine import BatchTrajectoryEngine
+from .census import FunnelCensus
+from .checkpoint import SamplingCheckpoint
+from .descent_check import DescentBoundCheck
+from .instrumentation import DISABLED, PipelineStats, timed_stage
+from .jump_table import get_jump_table
+from .modular_stats import ModularStats
+from .parallel import iter_shards, plan_shards
+from .range_sweep import RangeSweep
+from .results_store import ResultsStore
+from .stopping_table import StoppingTable
+from .streaming import PeakStream, iter_local_maxima
+from .trajectory_memo import TrajectoryMemo, get_shared_memo
 
 class CollatzInvestigator:
-    def __init__(self):
+    def __init__(self, memo=None, k_tabla=16, stats=None, mapa='C'):
         self.embudos_identificados = {}
         self.conexiones_descubiertas = []
+        # Map the batch engine and census advance with ('S' is the cheapest);
+        # their results are in standard steps whatever the map
+        self.mapa = mapa
+        self.motor_lote = BatchTrajectoryEngine(variant=mapa)
+        self.k_tabla = k_tabla
+        self.memo = memo if memo is not None else get_shared_memo()
+        # PipelineStats to record counters and stage timings (off by default)
+        self.stats = stats if stats is not None else DISABLED
+        self.stats.track_cache('trajectory_memo', self.memo)
         
     def collatz(self, n):
         """Basic Collatz function"""
@@ -21,42 +52,113 @@ class CollatzInvestigator:
             return 3 * n + 1
     
     def generar_secuencia(self, n, max_pasos=1000):
-        """Generate Collatz sequence with cycle detection"""
-        secuencia = [n]
-        actual = n
+        """Generate Collatz sequence with cycle detection
         
-        for _ in range(max_pasos):
-            actual = self.collatz(actual)
-            secuencia.append(actual)
+        Starts n >= 2 only step until they meet a value of the shared memo,
+        whose stored tail is spliced in.
+        """
+        if n >= 2:
+            secuencia = self.memo.sequence(n, self.collatz, max_pasos)
+        else:
+            secuencia = [n]
+            vistos = {n}
+            actual = n
             
-            if actual == 1:
-                break
-                
-            # Cycle detection
-            if actual in secuencia[:-1]:
-                break
+            for _ in range(max_pasos):
+                actual = self.collatz(actual)
+                secuencia.append(actual)
                 
+                if actual == 1:
+                    break
+                    
+                # Cycle detection: O(1) set lookup instead of rescanning the list
+                if actual in vistos:
+                    break
+                vistos.add(actual)
+        
+        self.stats.count('trajectories')
+        self.stats.count('steps', len(secuencia) - 1)
         return secuencia
     
-    def identificar_embudos(self, max_range=100000, muestra=5000):
-        """Identify embudos in specified range"""
+    def tiempo_de_parada(self, n):
+        """Steps needed to reach 1, using the shared trajectory memo"""
+        return self.memo.resolve(n, self.collatz)[0]
+    
+    def maximo_trayectoria(self, n):
+        """Largest value on the way to 1, using the shared trajectory memo"""
+        return self.memo.resolve(n, self.collatz)[1]
+    
+    @timed_stage('barrido_rango')
+    def barrido_rango(self, N, k=16):
+        """Stopping times and maxima for every n in 1..N, indexed by n
+        
+        Sweeps n upwards and reuses the data of a smaller value each
+        trajectory reaches; residues mod 2^k known to descend within k steps
+        jump straight to that value with a precomputed affine map. Rows
+        already stored in the memo's StoppingTable are reused. Returns
+        (tiempos, maximos) NumPy arrays.
+        """
+        tabla = self.memo.table
+        previos = None
+        if tabla is not None and tabla.first == 1 and len(tabla):
+            hasta = min(N, tabla.last)
+            previos = (np.concatenate([[-1], tabla.steps[:hasta]]).astype(np.int32),
+                       np.concatenate([[0], tabla.maxima[:hasta]]).astype(np.uint64))
+        return RangeSweep(k).run(N, previos=previos)
+    
+    @timed_stage('identificar_embudos')
+    def identificar_embudos(self, max_range=100000, muestra=5000, motor='lote', workers=1,
+                            punto_control=None, intervalo_control=30.0):
+        """Identify embudos in specified range
+        
+        motor='lote' advances all sampled starts together with
+        BatchTrajectoryEngine; motor='tabla' jumps k_tabla steps at a time
+        with a parity-vector JumpTable; motor='secuencial' streams them one
+        by one without materializing the sequences. workers > 1 shards the
+        residue classes and their sub-ranges over a process pool (None = one
+        per CPU); the merged counters are identical to the serial run.
+        
+        punto_control is a file where the counters and sampling cursors are
+        saved every intervalo_control seconds (SamplingCheckpoint). Rerunning
+        with the same file resumes an interrupted run, and a larger muestra
+        only walks the new samples (same counts; embudos tied on frequency
+        may rank in another order). The sample is a prefix of each class,
+        so to cover a larger max_range use censo_embudos, which extends
+        chunk by chunk.
+        """
         print(f"🔍 Mapping embudos in range 1-{max_range}...")
         
         embudos_candidatos = defaultdict(int)
         
-        # Stratified sampling by modular classes
-        for clase in range(1, 16, 2):  # Odd classes only
-            for i in range(muestra // 8):
-                n = clase + 16 * (i % (max_range // 16))
-                if n > max_range:
-                    continue
-                    
-                secuencia = self.generar_secuencia(n)
-                maximos_locales = self.extraer_maximos_locales(secuencia)
-                
-                for maximo in maximos_locales:
-                    if maximo > n * 10:  # Only significant maxima
-                        embudos_candidatos[maximo] += 1
+        # Stratified sampling by modular classes, sharded by class and sub-range
+        clases = list(range(1, 16, 2))  # Odd classes only
+        control = None
+        if punto_control is not None:
+            control = SamplingCheckpoint(punto_control, {'run': 'identificar_embudos',
+                                                         'max_range': max_range,
+                                                         'motor': motor}, intervalo_control)
+            if control.load():
+                control.check_samples(muestra // 8)
+                embudos_candidatos.update(control.state)
+                print(f"♻️  Resuming from {punto_control}")
+        
+        shards = plan_shards(clases, muestra // 8, workers,
+                             desde=control.cursors if control is not None else None)
+        ruta_tabla = self.memo.table.path if self.memo.table is not None else None
+        tareas = [(clase, inicio, fin, max_range, motor, self.k_tabla, self.stats.enabled,
+                   self.mapa, ruta_tabla)
+                  for clase, inicio, fin in shards]
+        
+        # Merge in shard order so insertion order matches the serial run
+        resultados = iter_shards(_contar_embudos_fragmento, tareas, workers)
+        for (clase, _, fin), (parcial, contadores) in zip(shards, resultados):
+            for maximo, cuenta in parcial.items():
+                embudos_candidatos[maximo] += cuenta
+            self.stats.merge_counters(contadores)
+            if control is not None:
+                control.advance(clase, fin, embudos_candidatos)
+        if control is not None:
+            control.save()
         
         # Filter significant embudos
         embudos_significativos = {k: v for k, v in embudos_candidatos.items() 
@@ -70,6 +172,123 @@ class CollatzInvestigator:
         print(f"🎯 Identified {len(self.embudos_identificados)} embudos")
         return self.embudos_identificados
     
+    @timed_stage('censo_embudos')
+    def censo_embudos(self, max_n, directorio='results/censo', modo='exhaustive',
+                      tamano_fragmento=1_000_000, muestras_por_fragmento=None,
+                      workers=1, semilla=0):
+        """Census of embudos over every odd start up to max_n
+        
+        Unlike identificar_embudos, which only revisits a prefix of the range,
+        this walks whole chunks ('exhaustive') or draws 'uniform' /
+        'stratified' samples per chunk. Per-chunk counters are written to
+        directorio, so rerunning resumes where an interrupted run stopped,
+        and rerunning with a larger max_n only walks the new slice.
+        """
+        censo = FunnelCensus(max_n, directorio, chunk_size=tamano_fragmento,
+                             mode=modo, samples_per_chunk=muestras_por_fragmento,
+                             seed=semilla, variant=self.mapa)
+        censo.run(workers=workers)
+        
+        self.embudos_identificados = censo.embudos(top=24)
+        print(f"🎯 Identified {len(self.embudos_identificados)} embudos")
+        return self.embudos_identificados
+    
+    @timed_stage('verificar_cota_descenso')
+    def verificar_cota_descenso(self, max_n, archivo='results/descent_bound.jsonl',
+                                tamano_bloque=1_000_000, workers=1):
+        """Check the draft's first-descent bound f(n) <= 8 (log2 n)^2 up to max_n
+        
+        Runs DescentBoundCheck: one summary line per block in archivo,
+        resumable, stopping at the first counterexample.
+        """
+        resumen = DescentBoundCheck(max_n, archivo, block_size=tamano_bloque).run(workers)
+        
+        print(f"📐 Worst f(n)/bound: {resumen['worst_ratio']:.4f} at n={resumen['worst_n']}, "
+              f"longest descent {resumen['max_steps']} steps at n={resumen['max_steps_n']}")
+        if resumen['first_counterexample'] is not None:
+            print(f"❌ Counterexample: n={resumen['first_counterexample']}")
+        return resumen
+    
+    def contar_embudos_fragmento(self, clase, inicio, fin, max_range, motor='lote'):
+        """Count significant maxima for sample indices [inicio, fin) of one class"""
+        inicios = []
+        for i in range(inicio, fin):
+            n = clase + 16 * (i % (max_range // 16))
+            if n > max_range:
+                continue
+            inicios.append(n)
+        
+        conteo = defaultdict(int)
+        # Only significant maxima (> 10n)
+        for maximos_locales in self.maximos_por_inicio(inicios, motor, factor_umbral=10):
+            for maximo in maximos_locales:
+                conteo[maximo] += 1
+        return dict(conteo)
+    
+    def maximos_por_inicio(self, inicios, motor='lote', max_pasos=1000, factor_umbral=0):
+        """Local maxima above factor_umbral * n of each start's sequence, in order
+        
+        Starts whose max excursion in the memo's StoppingTable is at most
+        factor_umbral * n cannot have such maxima: they get [] without being
+        walked.
+        """
+        descartados = self._sin_maximos_en_tabla(inicios, factor_umbral)
+        if descartados is None:
+            yield from self._caminar_maximos(inicios, motor, max_pasos, factor_umbral)
+            return
+        
+        self.stats.count('table_skips', int(descartados.sum()))
+        caminados = [n for n, fuera in zip(inicios, descartados) if not fuera]
+        resultados = self._caminar_maximos(caminados, motor, max_pasos, factor_umbral)
+        for fuera in descartados:
+            yield [] if fuera else next(resultados)
+        # Let the walk finish its counters
+        for _ in resultados:
+            pass
+    
+    def _sin_maximos_en_tabla(self, inicios, factor_umbral):
+        """Mask of the starts the StoppingTable rules out, or None without a table"""
+        tabla = self.memo.table
+        if tabla is None or not factor_umbral or not inicios:
+            return None
+        try:
+            valores = np.asarray(inicios, dtype=np.int64)
+        except OverflowError:
+            # Starts above 2^63 lie past any table: compare them as Python ints
+            valores = np.asarray(inicios, dtype=object)
+        # 1 is walked round its 1 -> 4 -> 2 -> 1 cycle, which the table does not record
+        dentro = ((valores >= max(tabla.first, 2)) & (valores <= tabla.last)).astype(bool)
+        descartados = np.zeros(valores.size, dtype=bool)
+        cubiertos = valores[dentro].astype(np.int64)
+        maximos = tabla.maxima[cubiertos - tabla.first]
+        descartados[dentro] = maximos <= cubiertos.astype(np.uint64) * np.uint64(factor_umbral)
+        return descartados
+    
+    def _caminar_maximos(self, inicios, motor, max_pasos, factor_umbral):
+        if motor == 'secuencial':
+            for n in inicios:
+                flujo = PeakStream(n, max_pasos)
+                yield [m for m, _, _ in flujo if m > n * factor_umbral]
+                self.stats.count('steps', flujo.length - 1)
+        elif motor == 'lote':
+            resultado = self.motor_lote.run(inicios, max_steps=max_pasos)
+            self.stats.count('steps', int(resultado['steps'].sum()))
+            for n, valores in zip(inicios, resultado['maxima_values']):
+                yield [m for m in valores.tolist() if m > n * factor_umbral]
+        elif motor == 'tabla':
+            tabla = get_jump_table(self.k_tabla)
+            for n in inicios:
+                _, maximos, pasos = tabla.local_maxima(n, max_pasos, umbral=n * factor_umbral)
+                self.stats.count('steps', pasos)
+                yield maximos
+        else:
+            raise ValueError(f"Unknown motor: {motor}")
+        self.stats.count('trajectories', len(inicios))
+    
+    def iterar_maximos_locales(self, n, max_pasos=1000):
+        """Stream the local maxima of n's sequence without building it"""
+        return iter_local_maxima(n, max_pasos)
+    
     def extraer_maximos_locales(self, secuencia):
         """Extract local maxima from sequence"""
         maximos = []
@@ -78,30 +297,103 @@ class CollatzInvestigator:
                 maximos.append(secuencia[i])
         return maximos
     
-    def analizar_conectividad(self, embudos):
-        """Analyze connectivity between embudos"""
+    @timed_stage('analizar_conectividad')
+    def analizar_conectividad(self, embudos, modo='directo'):
+        """Analyze connectivity between embudos
+        
+        Each embudo is walked once and linked to the first other embudo it
+        reaches, checked against a hash index. modo='directo' walks at most
+        20 steps per embudo; modo='indice_inverso' reuses adyacencia_embudos,
+        which shares walked values between embudos. Both keep connections
+        of at most 9 steps and give the same list.
+        """
         print("🔗 Analyzing embudo connectivity...")
         
         embudos_lista = list(embudos.keys())
+        indice = set(embudos_lista)
         conexiones = []
         
-        for i, embudo in enumerate(embudos_lista):
+        if modo == 'indice_inverso':
+            adyacencia = self.adyacencia_embudos(embudos_lista)
+        elif modo != 'directo':
+            raise ValueError(f"Unknown modo: {modo}")
+        
+        for embudo in embudos_lista:
             # Find path to next embudo
-            for j, objetivo in enumerate(embudos_lista):
-                if i != j:
-                    camino = self.encontrar_camino(embudo, objetivo, embudos_lista)
-                    if camino and len(camino) <= 10:  # Direct connections
-                        conexiones.append({
-                            'desde': embudo,
-                            'hacia': objetivo,
-                            'pasos': len(camino) - 1,
-                            'camino': camino
-                        })
-                        print(f"   {embudo} → {objetivo} ({len(camino)-1} steps)")
+            if modo == 'directo':
+                camino = self.encontrar_siguiente_embudo(embudo, indice)
+            elif adyacencia[embudo] is not None and adyacencia[embudo][1] <= 9:
+                camino = self.generar_secuencia(embudo, adyacencia[embudo][1])
+            else:
+                camino = None
+            
+            if camino and len(camino) <= 10:  # Direct connections
+                objetivo = camino[-1]
+                conexiones.append({
+                    'desde': embudo,
+                    'hacia': objetivo,
+                    'pasos': len(camino) - 1,
+                    'camino': camino
+                })
+                print(f"   {embudo} → {objetivo} ({len(camino)-1} steps)")
         
         self.conexiones_descubiertas = conexiones
         return conexiones
     
+    def encontrar_siguiente_embudo(self, inicio, indice, max_pasos=20):
+        """Path from inicio to the first other embudo in indice, or None"""
+        camino = [inicio]
+        actual = inicio
+        
+        for _ in range(max_pasos):
+            actual = self.collatz(actual)
+            camino.append(actual)
+            
+            if actual in indice and actual != inicio:
+                return camino
+            if actual == 1:
+                break
+        
+        return None
+    
+    def adyacencia_embudos(self, embudos):
+        """Next embudo reached by every embudo, as {embudo: (siguiente, pasos) or None}
+        
+        One sweep over all embudos: every walked value records the first
+        embudo downstream of it, so later walks stop as soon as they meet an
+        already-walked value. Scales to thousands of embudos.
+        """
+        indice = set(embudos)
+        siguiente = {}  # value -> (first embudo strictly after it, distance) or None
+        adyacencia = {}
+        
+        for embudo in embudos:
+            camino = []
+            actual = embudo
+            resultado = None
+            while True:
+                camino.append(actual)
+                actual = self.collatz(actual)
+                if actual in indice and actual != embudo:
+                    resultado = (actual, 0)
+                    break
+                if actual in siguiente:
+                    resultado = siguiente[actual]
+                    break
+                if actual == 1:
+                    break
+            
+            # Backfill: the k-th value from the end is k + 1 steps further away
+            for k, valor in enumerate(reversed(camino)):
+                if resultado is None:
+                    siguiente[valor] = None
+                else:
+                    siguiente[valor] = (resultado[0], resultado[1] + k + 1)
+            
+            adyacencia[embudo] = siguiente[embudo]
+        
+        return adyacencia
+    
     def encontrar_camino(self, inicio, fin, embudos_lista, max_pasos=20):
         """Find path between two numbers via Collatz"""
         camino = [inicio]
@@ -121,36 +413,75 @@ class CollatzInvestigator:
         
         return None
     
+    @timed_stage('analizar_distribucion_modular')
     def analizar_distribucion_modular(self, embudos, modulo=16):
         """Analyze modular distribution of embudos"""
-        distribucion = Counter()
-        
-        for embudo in embudos:
-            clase = embudo % modulo
-            distribucion[clase] += 1
+        distribucion = ModularStats(embudos).distribution(modulo)
         
         print(f"📊 Modular distribution (mod {modulo}):")
-        for clase in sorted(distribucion.keys()):
-            print(f"   Class {clase}: {distribucion[clase]} embudos")
+        for clase, cuenta in distribucion.items():
+            print(f"   Class {clase}: {cuenta} embudos")
         
-        return dict(distribucion)
+        return distribucion
     
-    def guardar_resultados(self, archivo='results/embudos_identificados.json'):
-        """Save results to JSON file"""
+    def guardar_resultados(self, archivo=None, formato=None):
+        """Save results as a columnar directory (ResultsStore) or as JSON
+
+        formato defaults to 'json' when archivo ends in .json, else 'columnar',
+        so by default results go to the results/embudos_identificados/
+        directory. Earlier versions wrote results/embudos_identificados.json,
+        which is no longer updated; pass formato='json' to keep writing it.
+        Values beyond uint64 are saved as archivo + '.json' instead.
+        """
+        if formato is None:
+            formato = 'json' if archivo is not None and archivo.endswith('.json') else 'columnar'
+        if formato not in ('columnar', 'json'):
+            raise ValueError(f"Unknown results format: {formato}")
+        if archivo is None:
+            archivo = 'results/embudos_identificados' + ('.json' if formato == 'json' else '')
+        timestamp = np.datetime64('now').astype(str)
+
+        if formato == 'columnar':
+            try:
+                ResultsStore.write(archivo, self.embudos_identificados,
+                                   self.conexiones_descubiertas, timestamp)
+                print(f"💾 Results saved to {archivo}/")
+                if os.path.exists(archivo + '.json'):
+                    print(f"⚠️  {archivo}.json is from an earlier run and was not updated")
+                return
+            except OverflowError:
+                # Readers prefer a results directory, so drop the outdated one
+                if os.path.exists(os.path.join(archivo, 'meta.json')):
+                    shutil.rmtree(archivo)
+                archivo += '.json'
+                print("⚠️  Values beyond uint64, falling back to JSON")
+
         resultados = {
             'embudos': self.embudos_identificados,
             'conexiones': self.conexiones_descubiertas,
-            'timestamp': np.datetime64('now').astype(str)
+            'timestamp': timestamp
         }
-        
+
         with open(archivo, 'w') as f:
             json.dump(resultados, f, indent=2)
-        
+
         print(f"💾 Results saved to {archivo}")
 
-def ejemplo_uso():
-    """Example usage"""
-    investigator = CollatzInvestigator()
+def _contar_embudos_fragmento(tarea):
+    """Process-pool entry point for one sampling shard; returns (conteo, contadores)"""
+    clase, inicio, fin, max_range, motor, k_tabla, instrumentar, mapa, ruta_tabla = tarea
+    memo = None
+    if ruta_tabla is not None:
+        # Shards map the caller's StoppingTable read-only to skip starts
+        memo = TrajectoryMemo(table=StoppingTable(ruta_tabla))
+    stats = PipelineStats() if instrumentar else None
+    investigator = CollatzInvestigator(memo=memo, k_tabla=k_tabla, stats=stats, mapa=mapa)
+    conteo = investigator.contar_embudos_fragmento(clase, inicio, fin, max_range, motor)
+    return conteo, dict(stats.counters) if stats is not None else {}
+
+def ejemplo_uso(stats=None):
+    """Example usage (pass a PipelineStats to get a stage/counter report)"""
+    investigator = CollatzInvestigator(stats=stats)
     
     # Identify embudos
     embudos = investigator.identificar_embudos(max_range=100000)
@@ -164,6 +495,7 @@ def ejemplo_uso():
     # Save results
     investigator.guardar_resultados()
     
+    investigator.stats.report()
     return investigator
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+"""
+Sparse Collatz successor graph over a range, stored as arrays
+"""
+
+from collections import deque
+
+import numpy as np
+
+from .range_sweep import RangeSweep
+
+
+class CollatzGraph:
+    """Successor graph of 1..limite without per-node Python objects.
+
+    Successors are implicit (n // 2 or 3n + 1, computed on demand), so the
+    only stored arrays are the in-degree of every node, the predecessor
+    lists in CSR form (``indptr``/``indices``, each node has at most two)
+    and the depth to 1. Edges whose successor lies above limite leave the
+    store; trajectories stop at 1, so 1 has no successor. Depths are read
+    from a StoppingTable starting at 1 when one covering limite is given,
+    and swept with RangeSweep otherwise. Only the subgraph being drawn is
+    ever exported to networkx.
+    """
+
+    def __init__(self, limite, table=None):
+        if limite < 1:
+            raise ValueError("limite must be at least 1")
+        self.limite = limite
+        tipo = np.min_scalar_type(limite)
+
+        nodos = np.arange(2, limite + 1, dtype=np.uint64)
+        destinos = self.successors(nodos)
+        dentro = destinos <= limite
+        nodos, destinos = nodos[dentro].astype(tipo), destinos[dentro].astype(np.int64)
+
+        self.in_degree = np.bincount(destinos, minlength=limite + 1).astype(np.uint8)
+        self.indptr = np.concatenate([[0], np.cumsum(self.in_degree, dtype=np.int64)])
+        # Stable sort keeps each node's predecessors in increasing order
+        self.indices = nodos[np.argsort(destinos, kind='stable')]
+
+        if table is not None and table.first == 1 and limite in table:
+            self.depths = np.concatenate([[-1], table.steps[:limite]]).astype(np.int32)
+        else:
+            self.depths = RangeSweep().run(limite)[0]
+
+    @staticmethod
+    def successors(nodos):
+        """Vectorized successor of each value (1 maps to 4 here, like the map)"""
+        nodos = np.asarray(nodos, dtype=np.uint64)
+        return np.where(nodos & np.uint64(1), 3 * nodos + np.uint64(1), nodos >> np.uint64(1))
+
+    def successor(self, n):
+        """Successor of n, or None for 1 where trajectories stop"""
+        if n == 1:
+            return None
+        return 3 * n + 1 if n % 2 else n // 2
+
+    def predecessors(self, n):
+        """Predecessors of n inside the range, in increasing order"""
+        return self.indices[self.indptr[n]:self.indptr[n + 1]]
+
+    def merge_points(self):
+        """Values reached from two in-range predecessors (2n and (n - 1) / 3)"""
+        return np.flatnonzero(self.in_degree >= 2)
+
+    def depth_to_one(self, n):
+        """Standard steps from n to 1"""
+        return int(self.depths[n])
+
+    def ancestors(self, raiz, max_depth=None, max_nodes=None):
+        """In-range values whose trajectory reaches raiz, closest first"""
+        encontrados = [raiz]
+        cola = deque([(raiz, 0)])
+
+        while cola and (max_nodes is None or len(encontrados) < max_nodes):
+            nodo, profundidad = cola.popleft()
+            if max_depth is not None and profundidad >= max_depth:
+                continue
+            for previo in self.predecessors(nodo).tolist():
+                encontrados.append(previo)
+                cola.append((previo, profundidad + 1))
+                if max_nodes is not None and len(encontrados) >= max_nodes:
+                    break
+
+        return encontrados
+
+    def subgraph_edges(self, nodos):
+        """(n, successor) edges with both ends in nodos"""
+        nodos = np.unique(np.asarray(list(nodos), dtype=np.uint64))
+        nodos = nodos[nodos > 1]
+        destinos = self.successors(nodos)
+        dentro = np.isin(destinos, nodos)
+        return list(zip(nodos[dentro].tolist(), destinos[dentro].tolist()))
+
+    def to_networkx(self, nodos):
+        """DiGraph of the given nodes only, with in_degree and depth attributes"""
+        import networkx as nx
+
+        G = nx.DiGraph()
+        for n in nodos:
+            n = int(n)
+            if n <= self.limite:
+                G.add_node(n, in_degree=int(self.in_degree[n]), depth=int(self.depths[n]))
+            else:
+                G.add_node(n)
+        G.add_edges_from(self.subgraph_edges(nodos))
+        return G
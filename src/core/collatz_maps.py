@@ -0,0 +1,156 @@
+"""
+Collatz map variants: standard C, shortcut T, the draft's T* and Syracuse
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+# 'C'  standard step: n/2 or 3n+1
+# 'T'  shortcut: n/2 or (3n+1)/2
+# 'T*' current_draft.MD: n/2 (n = 0 mod 4), (3n+2)/2 (n = 2 mod 4), (3n+1)/2 (n odd)
+# 'S'  Syracuse, odd to odd: (3n+1)/2^v with every factor of 2 stripped
+VARIANTS = ('C', 'T', 'T*', 'S')
+
+
+def check_variant(variant):
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown Collatz map variant: {variant}")
+    return variant
+
+
+def _ctz(n):
+    return (n & -n).bit_length() - 1
+
+
+def map_step(n, variant='C'):
+    """One step of variant from n: (image, c_steps, odd)
+
+    The image is C^c_steps(n). odd is the odd value the step passes
+    through, whose 3*odd + 1 is the standard trajectory's local maximum
+    inside the step, or None. An even start only gets its factors of 2
+    stripped under 'S'.
+    """
+    if n % 2:
+        if variant == 'C':
+            return 3 * n + 1, 1, n
+        siguiente = 3 * n + 1
+        if variant == 'S':
+            k = _ctz(siguiente)
+            return siguiente >> k, k + 1, n
+        return siguiente >> 1, 2, n
+    if variant == 'T*' and n % 4 == 2:
+        return (3 * n + 2) // 2, 2, n // 2
+    if variant == 'S':
+        k = _ctz(n)
+        return n >> k, k, None
+    return n // 2, 1, None
+
+
+def _terminal_step(n, variant):
+    # T*(2) = C^2(2) = 4 jumps over 1; walks take the single C step 2 -> 1
+    if variant == 'T*' and n == 2:
+        return 1, 1, None
+    return map_step(n, variant)
+
+
+def map_trajectory(n, variant='C', max_steps=1000):
+    """n's trajectory under variant and the standard position of each value
+
+    Returns (values, c_positions). Like generar_secuencia it stops at 1 or
+    after max_steps standard steps; a step that would overshoot max_steps
+    is left out.
+    """
+    check_variant(variant)
+    valores, posiciones = [n], [0]
+    actual, posicion = n, 0
+
+    while posicion < max_steps and not (posicion >= 1 and actual == 1):
+        actual, k, _ = _terminal_step(actual, variant)
+        posicion += k
+        if posicion > max_steps:
+            break
+        valores.append(actual)
+        posiciones.append(posicion)
+
+    return valores, posiciones
+
+
+def c_peaks(n, variant='C', max_steps=1000):
+    """Local maxima of n's standard trajectory, read off the variant's steps
+
+    Returns [(value, position)] exactly as PeakStream yields them (value
+    and position), for a fraction of the steps with 'T', 'T*' or 'S'.
+    """
+    check_variant(variant)
+    picos = []
+    actual, posicion = n, 0
+
+    while posicion < max_steps and not (posicion >= 1 and actual == 1):
+        siguiente, k, impar = _terminal_step(actual, variant)
+        if impar is not None:
+            # 3*odd + 1 comes one standard step after the odd value
+            posicion_pico = posicion + (1 if impar == actual else 2)
+            if posicion_pico < max_steps:
+                picos.append((3 * impar + 1, posicion_pico))
+        actual = siguiente
+        posicion += k
+
+    return picos
+
+
+def map_index(c_positions, position):
+    """Index of the map value at a standard position, or of the last one before it"""
+    return bisect_right(c_positions, position) - 1
+
+
+def trailing_zeros(valores):
+    """Trailing zero bits of each value of a uint64 array, as int64 (64 for 0)"""
+    if hasattr(np, 'bitwise_count'):
+        aislado = valores & (~valores + np.uint64(1))
+        return np.bitwise_count(aislado - np.uint64(1)).astype(np.int64)
+
+    # NumPy < 2.0: shift the still-even lanes, runs of 2s are short; zero
+    # lanes would never turn odd, so they are set aside
+    nulos = valores == 0
+    ceros = np.where(nulos, 64, 0).astype(np.int64)
+    restos = valores.copy()
+    pares = ((restos & np.uint64(1)) == 0) & ~nulos
+    while pares.any():
+        restos[pares] >>= np.uint64(1)
+        ceros[pares] += 1
+        pares = ((restos & np.uint64(1)) == 0) & ~nulos
+    return ceros
+
+
+def map_step_array(valores, variant='C'):
+    """map_step over a uint64 array: (images, c_steps, has_odd, odd)
+
+    odd is 0 where has_odd is False. The caller keeps 3*odd + 1 within
+    uint64 (odd <= (2**64 - 2) // 3).
+    """
+    uno = np.uint64(1)
+    impares = (valores & uno).astype(bool)
+    impar = valores * impares
+
+    if variant == 'C':
+        return (np.where(impares, 3 * valores + uno, valores >> uno),
+                np.ones(valores.size, dtype=np.int64), impares, impar)
+
+    if variant == 'S':
+        bases = np.where(impares, 3 * valores + uno, valores)
+        ceros = trailing_zeros(bases)
+        return bases >> ceros.astype(np.uint64), ceros + impares, impares, impar
+
+    # T and T*: odd n -> (3n+1)/2 in two standard steps
+    imagenes = np.where(impares, (3 * valores + uno) >> uno, valores >> uno)
+    pasos = impares + 1
+    if variant == 'T*':
+        # n = 2 mod 4 -> (3n+2)/2 = 3(n/2) + 1 through the odd value n/2
+        dos = (valores & np.uint64(3)) == 2
+        mitades = valores >> uno
+        imagenes[dos] = 3 * mitades[dos] + uno
+        pasos[dos] = 2
+        impares = impares | dos
+        impar = np.where(dos, mitades, impar)
+    return imagenes, pasos.astype(np.int64), impares, impar
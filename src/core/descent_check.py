@@ -0,0 +1,218 @@
+"""
+Block-wise verification of the draft's 8(log2 n)^2 first-descent bound
+"""
+
+import json
+import os
+from contextlib import closing
+
+import numpy as np
+
+from .batch_engine import LIMITE_UINT64
+from .collatz_maps import trailing_zeros
+from .parallel import iter_shards
+
+
+def descent_bound(n):
+    """8 (log2 n)^2, the first-descent bound of current_draft.MD (Theorem 5)"""
+    return 8.0 * np.log2(n) ** 2
+
+
+def _bit_length(q):
+    """Bit length of each value of a uint64 array of positive values"""
+    j = np.frexp(q.astype(np.float64))[1].astype(np.int64)
+    # Rounding to float can lift q just below a power of two onto it
+    j -= (q >> (j - 1).astype(np.uint64)) == 0
+    return j
+
+
+def first_descent_times(inicios):
+    """Standard steps until each odd start > 1 first drops below itself
+
+    Syracuse-style: every iteration does one 3x+1 and then either all of
+    its halvings or, when they cross below the start, only the ones needed
+    (the bit length of (3x+1) // n). Lanes that would overflow uint64
+    finish with Python ints.
+    """
+    inicios = np.asarray(inicios, dtype=np.uint64)
+    pasos = np.zeros(inicios.size, dtype=np.int64)
+    actual = inicios.copy()
+    activos = np.arange(inicios.size)
+    grandes = []
+
+    while activos.size:
+        x = actual[activos]
+        desborde = x > LIMITE_UINT64
+        if desborde.any():
+            grandes.extend(activos[desborde].tolist())
+            activos, x = activos[~desborde], x[~desborde]
+
+        subida = 3 * x + np.uint64(1)
+        ceros = trailing_zeros(subida)
+        necesarias = _bit_length(subida // inicios[activos])
+        baja = necesarias <= ceros
+
+        pasos[activos] += 1 + np.where(baja, necesarias, ceros)
+        actual[activos] = subida >> ceros.astype(np.uint64)
+        activos = activos[~baja]
+
+    for i in grandes:
+        n, x, k = int(inicios[i]), int(actual[i]), 0
+        while x >= n:
+            x = 3 * x + 1 if x % 2 else x // 2
+            k += 1
+        pasos[i] += k
+
+    return pasos
+
+
+class DescentBoundCheck:
+    """Check f(n) <= 8 (log2 n)^2 for every 2 <= n <= max_n, block by block.
+
+    f(n) is the first-descent time, min{m : C^m(n) < n}. Even n descend in
+    1 step and n = 1 mod 4 in 3, so only n = 3 mod 4 are walked; the other
+    classes enter each block's worst ratio in closed form. Blocks of
+    ``block_size`` run over a process pool, and each one appends a compact
+    summary line to ``path`` (JSON lines): bounds, numbers checked,
+    longest descent, worst f(n)/bound and the counterexamples found. A
+    rerun skips blocks already in the file, and the run stops after the
+    first block holding a counterexample.
+    """
+
+    def __init__(self, max_n, path='results/descent_bound.jsonl', block_size=1_000_000):
+        if max_n < 2:
+            raise ValueError("The descent bound is stated for n >= 2")
+        self.max_n = max_n
+        self.path = path
+        self.block_size = block_size
+
+    @property
+    def block_count(self):
+        return -(-(self.max_n - 1) // self.block_size)
+
+    def block_bounds(self, index):
+        """Inclusive (lo, hi) range covered by a block"""
+        lo = index * self.block_size + 2
+        return lo, min(lo + self.block_size - 1, self.max_n)
+
+    def summaries(self):
+        """Block summaries written so far, in file order"""
+        if not os.path.exists(self.path):
+            return []
+        resumenes = []
+        with open(self.path) as f:
+            for linea in f:
+                try:
+                    resumenes.append(json.loads(linea))
+                except json.JSONDecodeError:
+                    continue  # blank or cut short by a killed run; that block reruns
+        return resumenes
+
+    def run(self, workers=1):
+        """Check every pending block; returns the overall summary"""
+        resumenes = self.summaries()
+        if any(r['counterexamples'] for r in resumenes if r['hi'] <= self.max_n):
+            print(f"❌ {self.path} already holds a counterexample")
+            return self.overall()
+        hechos = {(r['lo'], r['hi']) for r in resumenes}
+        pendientes = [self.block_bounds(i) for i in range(self.block_count)
+                      if self.block_bounds(i) not in hechos]
+        print(f"🔍 First-descent bound 2-{self.max_n}: "
+              f"{len(pendientes)}/{self.block_count} blocks pending")
+
+        directorio = os.path.dirname(self.path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        cortada = self._partial_last_line()
+
+        # Closing the results cancels the blocks still queued after an early stop
+        with open(self.path, 'a') as f, \
+                closing(iter_shards(_check_descent_block, pendientes, workers)) as resultados:
+            if cortada:
+                f.write('\n')
+            for resumen in resultados:
+                f.write(json.dumps(resumen) + '\n')
+                f.flush()
+                if resumen['counterexamples']:
+                    print(f"❌ Counterexample n={resumen['first_counterexample']} in "
+                          f"block {resumen['lo']}-{resumen['hi']}, stopping")
+                    break
+
+        return self.overall()
+
+    def _partial_last_line(self):
+        """True when a killed run left the file without its final newline"""
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+
+    def overall(self):
+        """Fold the summaries of the current blocks into one
+
+        Lines left by runs with another max_n or block_size (e.g. the old
+        partial last block of an extended run) are ignored.
+        """
+        bloques = {self.block_bounds(i) for i in range(self.block_count)}
+        resumenes = {(r['lo'], r['hi']): r for r in self.summaries()
+                     if (r['lo'], r['hi']) in bloques}.values()
+        total = {'blocks': len(resumenes), 'checked': 0, 'worst_ratio': 0.0, 'worst_n': None,
+                 'max_steps': 0, 'max_steps_n': None, 'counterexamples': 0,
+                 'first_counterexample': None}
+        for r in resumenes:
+            total['checked'] += r['checked']
+            if r['worst_ratio'] > total['worst_ratio']:
+                total['worst_ratio'], total['worst_n'] = r['worst_ratio'], r['worst_n']
+            if r['max_steps'] > total['max_steps']:
+                total['max_steps'], total['max_steps_n'] = r['max_steps'], r['max_steps_n']
+            total['counterexamples'] += r['counterexamples']
+            if r['first_counterexample'] is not None and (
+                    total['first_counterexample'] is None
+                    or r['first_counterexample'] < total['first_counterexample']):
+                total['first_counterexample'] = r['first_counterexample']
+        return total
+
+
+def check_descent_block(lo, hi):
+    """Summary of f(n) against the bound for lo <= n <= hi (lo >= 2)"""
+    # Worst closed-form ratios: smallest even n (f = 1) and n = 1 mod 4 (f = 3)
+    candidatos = []
+    par = lo + (lo & 1)
+    if par <= hi:
+        candidatos.append((1, par))
+    uno = lo + (1 - lo) % 4
+    if uno <= hi:
+        candidatos.append((3, uno))
+
+    n = np.arange(lo + (3 - lo) % 4, hi + 1, 4, dtype=np.uint64)
+    pasos = first_descent_times(n)
+    razones = pasos / descent_bound(n.astype(np.float64))
+    malos = np.flatnonzero(razones > 1.0)
+
+    resumen = {'lo': lo, 'hi': hi, 'checked': hi - lo + 1,
+               'worst_ratio': 0.0, 'worst_n': None,
+               'max_steps': 0, 'max_steps_n': None,
+               'counterexamples': int(malos.size),
+               'first_counterexample': int(n[malos[0]]) if malos.size else None}
+
+    for f, m in candidatos:
+        razon = f / descent_bound(m)
+        if razon > resumen['worst_ratio']:
+            resumen['worst_ratio'], resumen['worst_n'] = float(razon), m
+        if f > resumen['max_steps']:
+            resumen['max_steps'], resumen['max_steps_n'] = f, m
+    if n.size:
+        i = int(np.argmax(razones))
+        if razones[i] > resumen['worst_ratio']:
+            resumen['worst_ratio'], resumen['worst_n'] = float(razones[i]), int(n[i])
+        i = int(np.argmax(pasos))
+        if pasos[i] > resumen['max_steps']:
+            resumen['max_steps'], resumen['max_steps_n'] = int(pasos[i]), int(n[i])
+    return resumen
+
+
+def _check_descent_block(tarea):
+    """Process-pool entry point for one block"""
+    return check_descent_block(*tarea)
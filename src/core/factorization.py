@@ -0,0 +1,172 @@
+"""
+Prime factorization with a smallest-prime-factor sieve and Pollard-rho
+"""
+
+from collections import OrderedDict
+from math import gcd, isqrt
+import random
+
+import numpy as np
+
+# Miller-Rabin with these bases is deterministic below 3.3e24
+_BASES_MR = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+_LIMITE_DETERMINISTA = 3317044064679887385961981
+
+
+class Factorizer:
+    """Memoized factorization for values from small to far beyond 10^12.
+
+    Values up to ``sieve_limit`` are split by repeated lookups in a
+    smallest-prime-factor table built once with NumPy. Larger values lose
+    their small factors by trial division with the sieve's primes below
+    ``trial_limit``; what is left is tested with Miller-Rabin and split
+    with Pollard-rho (Brent's variant) until every part is prime or small
+    enough for the sieve. Results are kept in an LRU memo of
+    ``cache_size`` entries.
+    """
+
+    def __init__(self, sieve_limit=1 << 20, trial_limit=1000, cache_size=100_000):
+        if sieve_limit < 2:
+            raise ValueError("sieve_limit must be at least 2")
+        self.sieve_limit = sieve_limit
+        self.cache_size = cache_size
+        self._memo = OrderedDict()
+        self._criba = self._construir_criba(sieve_limit)
+        tope = min(trial_limit, sieve_limit)
+        candidatos = np.arange(2, tope + 1)
+        self._primos_prueba = candidatos[self._criba[2:tope + 1] == candidatos].tolist()
+
+    def _construir_criba(self, limite):
+        """Smallest prime factor of every value up to limite"""
+        criba = np.zeros(limite + 1, dtype=np.uint32)
+        for p in range(2, isqrt(limite) + 1):
+            if criba[p] == 0:
+                multiplos = criba[p * p::p]
+                multiplos[multiplos == 0] = p
+        primos = criba == 0
+        criba[primos] = np.flatnonzero(primos)
+        return criba
+
+    def factorize(self, n):
+        """Prime factors of n with multiplicity, in increasing order"""
+        if n < 2:
+            return []
+        if n in self._memo:
+            self._memo.move_to_end(n)
+            return list(self._memo[n])
+
+        factores = sorted(self._factorizar(n))
+
+        self._memo[n] = tuple(factores)
+        if len(self._memo) > self.cache_size:
+            self._memo.popitem(last=False)
+        return factores
+
+    def factorize_many(self, values):
+        """value -> prime factors for every value (dict keys, list or array)"""
+        return {int(n): self.factorize(int(n)) for n in values}
+
+    def _factorizar(self, n):
+        if n <= self.sieve_limit:
+            return self._por_criba(n)
+
+        factores = []
+        for p in self._primos_prueba:
+            if p * p > n:
+                break
+            while n % p == 0:
+                factores.append(p)
+                n //= p
+
+        pendientes = [n] if n > 1 else []
+        while pendientes:
+            m = pendientes.pop()
+            if m <= self.sieve_limit:
+                factores.extend(self._por_criba(m))
+            elif is_probable_prime(m):
+                factores.append(m)
+            else:
+                d = pollard_rho(m)
+                pendientes.extend((d, m // d))
+        return factores
+
+    def _por_criba(self, n):
+        factores = []
+        while n > 1:
+            p = int(self._criba[n])
+            factores.append(p)
+            n //= p
+        return factores
+
+
+def is_probable_prime(n):
+    """Miller-Rabin test, deterministic for n below 3.3e24"""
+    if n < 2:
+        return False
+    for p in _BASES_MR:
+        if n % p == 0:
+            return n == p
+
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    bases = _BASES_MR if n < _LIMITE_DETERMINISTA else _BASES_MR + tuple(
+        random.Random(n).randrange(2, n - 1) for _ in range(8))
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def pollard_rho(n):
+    """A non-trivial factor of composite n (Brent's cycle detection)"""
+    if n % 2 == 0:
+        return 2
+    rng = random.Random(n)
+
+    while True:
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                # Batch the gcds: one per m steps of the product
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += m
+            r *= 2
+
+        if g == n:
+            # The batch overshot; redo it one step at a time
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+_factorizador = None
+
+
+def get_factorizer():
+    """Factorizer shared by the whole process, sieve built on first use"""
+    global _factorizador
+    if _factorizador is None:
+        _factorizador = Factorizer()
+    return _factorizador
@@ -4,52 +4,70 @@ Fractal structure detection in Collatz sequences
 
 import numpy as np
 from collections import defaultdict
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .instrumentation import DISABLED, timed_stage
+
+# Pattern lengths tried by detectar_patron_ratios, shortest first
+LONGITUDES_PATRON = (2, 3, 4)
+UINT64_MAX = 2**64 - 1
+# Integers up to here are exact in float64, so dividing them as floats
+# matches Python's int / int; larger values are divided as ints
+FLOAT_EXACTO_MAX = 2**53
 
 class FractalDetector:
-    def __init__(self):
+    def __init__(self, stats=None):
         self.patrones_fractales = []
-        
-    def detectar_autosimilitud(self, secuencias, niveles=3):
+        # PipelineStats to record counters and stage timings (off by default)
+        self.stats = stats if stats is not None else DISABLED
+    
+    @timed_stage('detectar_autosimilitud')
+    def detectar_autosimilitud(self, secuencias, niveles=3, base=10):
         """Detect self-similarity across different scales"""
         print("🔍 Detecting fractal self-similarity...")
         
         patrones_por_nivel = defaultdict(list)
         
-        for nivel in range(niveles):
-            escala = 10 ** nivel
-            patrones_nivel = self.analizar_patrones_escala(secuencias, escala)
+        for nivel, escala, patrones_nivel in self.iterar_autosimilitud(secuencias, niveles, base):
             patrones_por_nivel[nivel] = patrones_nivel
             
             print(f"   Level {nivel} (scale {escala}): {len(patrones_nivel)} patterns")
         
         return patrones_por_nivel
     
+    def iterar_autosimilitud(self, secuencias, niveles=3, base=10):
+        """Yield (nivel, escala, patrones) for scales base^0 .. base^(niveles-1)
+        
+        All sequences are flattened once and their magnitudes computed
+        once; each level is then a mask and a floor division (a shift for
+        bases 2 and 16) on that array, so extra levels are cheap and
+        results can be consumed as soon as a level is done.
+        """
+        lote = LoteSecuencias(secuencias)
+        self.stats.count('sequences_scanned', lote.total)
+        for nivel in range(niveles):
+            with self.stats.stage(f'autosimilitud_nivel_{nivel}'):
+                patrones = lote.patrones_nivel(nivel, base)
+            self.stats.count('patterns_found', len(patrones))
+            yield nivel, base ** nivel, patrones
+    
     def analizar_patrones_escala(self, secuencias, escala):
         """Analyze patterns at specific scale"""
-        patrones = []
-        
-        for secuencia in secuencias:
-            # Normalize sequence to current scale
-            secuencia_escala = [x // escala for x in secuencia if x >= escala]
-            
-            if len(secuencia_escala) > 10:
-                patron = self.extraer_patron_estructural(secuencia_escala)
-                if patron:
-                    patrones.append(patron)
-        
-        return patrones
+        return LoteSecuencias(secuencias).patrones_escala(escala)
     
     def extraer_patron_estructural(self, secuencia):
         """Extract structural pattern from sequence"""
         if len(secuencia) < 5:
             return None
-            
+        
         # Calculate growth ratios
-        ratios = []
-        for i in range(1, len(secuencia)):
-            if secuencia[i-1] > 0:
-                ratio = secuencia[i] / secuencia[i-1]
-                ratios.append(ratio)
+        if max(secuencia) > FLOAT_EXACTO_MAX:
+            ratios = np.array([b / a for a, b in zip(secuencia, secuencia[1:]) if a > 0],
+                              dtype=np.float64)
+        else:
+            valores = np.array(secuencia, dtype=np.float64)
+            anteriores = valores[:-1]
+            ratios = valores[1:][anteriores > 0] / anteriores[anteriores > 0]
         
         # Look for repeating ratio patterns
         if len(ratios) >= 3:
@@ -59,18 +77,27 @@ class FractalDetector:
         return None
     
     def detectar_patron_ratios(self, ratios, tolerancia=0.1):
-        """Detect repeating ratio patterns"""
+        """Detect repeating ratio patterns
+        
+        Window i of length L repeats when every |r[i+j] - r[i+L+j]| is
+        within tolerancia; all windows of a length are tested at once.
+        """
+        ratios = np.asarray(ratios, dtype=np.float64)
         for longitud_patron in range(2, min(5, len(ratios)//2)):
-            for i in range(len(ratios) - longitud_patron * 2):
-                patron = ratios[i:i+longitud_patron]
-                siguiente = ratios[i+longitud_patron:i+longitud_patron*2]
-                
-                if self.son_similares(patron, siguiente, tolerancia):
-                    return {
-                        'longitud': longitud_patron,
-                        'patron': patron,
-                        'posicion': i
-                    }
+            posiciones = len(ratios) - longitud_patron * 2
+            if posiciones <= 0:
+                continue
+            
+            cerca = np.abs(ratios[:-longitud_patron] - ratios[longitud_patron:]) <= tolerancia
+            repetidas = sliding_window_view(cerca, longitud_patron)[:posiciones].all(axis=1)
+            
+            if repetidas.any():
+                i = int(np.argmax(repetidas))
+                return {
+                    'longitud': longitud_patron,
+                    'patron': ratios[i:i+longitud_patron].tolist(),
+                    'posicion': i
+                }
         
         return None
     
@@ -78,22 +105,24 @@ class FractalDetector:
         """Check if two ratio lists are similar"""
         if len(lista1) != len(lista2):
             return False
-            
+        
         for a, b in zip(lista1, lista2):
             if abs(a - b) > tolerancia:
                 return False
-                
+        
         return True
     
-    def analizar_embudos_por_escala(self, embudos):
+    @timed_stage('analizar_embudos_por_escala')
+    def analizar_embudos_por_escala(self, embudos, niveles=5, base=10):
         """Analyze embudo distribution across scales"""
         print("📈 Analyzing embudo distribution across scales...")
         
-        escalas = [1, 10, 100, 1000, 10000]
+        lote = LoteSecuencias([list(embudos)])
         resultados = {}
         
-        for escala in escalas:
-            embudos_escala = [e // escala for e in embudos if e >= escala]
+        for nivel in range(niveles):
+            escala = base ** nivel
+            embudos_escala = lote.valores_nivel(nivel, base)
             if embudos_escala:
                 densidad = len(embudos_escala) / len(embudos)
                 resultados[escala] = {
@@ -102,4 +131,139 @@ class FractalDetector:
                 }
                 print(f"   Scale {escala}: density = {densidad:.3f}")
         
-        return resultados
\ No newline at end of file
+        return resultados
+
+
+class LoteSecuencias:
+    """Many sequences flattened into one uint64 array with sequence ids.
+
+    patrones_escala reproduces analizar_patrones_escala +
+    detectar_patron_ratios for every sequence at once: the kept values of
+    a sequence stay contiguous, so ratios, window comparisons and the
+    first match per sequence are all array operations. Sequences with
+    values beyond uint64 go through the per-sequence path.
+    """
+
+    def __init__(self, secuencias, tolerancia=0.1):
+        self.tolerancia = tolerancia
+        self.grandes = {}
+        self.total = 0
+        valores, ids = [], []
+
+        for indice, secuencia in enumerate(secuencias):
+            self.total = indice + 1
+            try:
+                valores.append(np.asarray(secuencia, dtype=np.uint64))
+            except OverflowError:
+                self.grandes[indice] = secuencia
+                continue
+            ids.append(indice)
+
+        largos = [len(v) for v in valores]
+        self.valores = np.concatenate(valores) if valores else np.zeros(0, dtype=np.uint64)
+        self.ids = np.repeat(np.array(ids, dtype=np.int64), largos)
+        self._magnitudes = {}
+
+    def magnitudes(self, base=10):
+        """floor(log_base(x)) of every value, computed once per base"""
+        if base not in self._magnitudes:
+            potencias = [1]
+            while potencias[-1] * base <= UINT64_MAX:
+                potencias.append(potencias[-1] * base)
+            potencias = np.array(potencias, dtype=np.uint64)
+            magnitudes = np.searchsorted(potencias, self.valores, side='right') - 1
+            self._magnitudes[base] = magnitudes.astype(np.int8)
+        return self._magnitudes[base]
+
+    def escalar_nivel(self, nivel, base=10):
+        """Mask of values >= base^nivel and those values floor-divided by it"""
+        escala = base ** nivel
+        mascara = self.magnitudes(base) >= nivel
+        valores = self.valores[mascara]
+        if escala > UINT64_MAX:
+            return mascara, valores
+        if base & (base - 1) == 0:
+            return mascara, valores >> np.uint64(nivel * (base.bit_length() - 1))
+        return mascara, valores // np.uint64(escala)
+
+    def valores_nivel(self, nivel, base=10):
+        """Every value at one level (x // base^nivel for x >= base^nivel), as ints"""
+        escala = base ** nivel
+        valores = self.escalar_nivel(nivel, base)[1].tolist()
+        for secuencia in self.grandes.values():
+            valores.extend(x // escala for x in secuencia if x >= escala)
+        return valores
+
+    def patrones_nivel(self, nivel, base=10):
+        """Pattern of every sequence at scale base^nivel, in sequence order"""
+        mascara, valores = self.escalar_nivel(nivel, base)
+        return self._patrones(mascara, valores, base ** nivel)
+
+    def patrones_escala(self, escala):
+        """Pattern of every sequence at one scale, in sequence order"""
+        if escala > UINT64_MAX:
+            mascara = np.zeros(self.valores.size, dtype=bool)
+            return self._patrones(mascara, self.valores[mascara], escala)
+        mascara = self.valores >= escala
+        return self._patrones(mascara, self.valores[mascara] // np.uint64(escala), escala)
+
+    def _patrones(self, mascara, valores, escala):
+        if valores.size and valores.max() > FLOAT_EXACTO_MAX:
+            valores = valores.astype(object)
+        ids = self.ids[mascara]
+        largo = np.bincount(ids, minlength=self.total)
+
+        # Ratios between consecutive kept values of the same sequence
+        misma = ids[1:] == ids[:-1]
+        if valores.dtype == object:
+            ratios = (valores[1:][misma] / valores[:-1][misma]).astype(np.float64)
+        else:
+            valores = valores.astype(np.float64)
+            ratios = (valores[1:] / valores[:-1])[misma]
+        ids_ratio = ids[1:][misma]
+        cantidad = np.maximum(largo - 1, 0)
+        inicio = np.concatenate([[0], np.cumsum(cantidad)[:-1]])
+        local = np.arange(ratios.size) - inicio[ids_ratio]
+
+        encontrado = {}
+        pendiente = largo > 10
+        for longitud in LONGITUDES_PATRON:
+            # Later lengths only need the sequences still without a pattern
+            activas = pendiente[ids_ratio]
+            ratios, ids_ratio, local = ratios[activas], ids_ratio[activas], local[activas]
+            if ratios.size < 2 * longitud + 1:
+                break
+
+            cerca = np.abs(ratios[:-longitud] - ratios[longitud:]) <= self.tolerancia
+            posiciones = cerca.size - longitud + 1
+            repetidas = cerca[:posiciones].copy()
+            for desplazamiento in range(1, longitud):
+                repetidas &= cerca[desplazamiento:desplazamiento + posiciones]
+
+            # Same bounds as the per-sequence loop, which never touches the last ratio
+            n = cantidad[ids_ratio[:posiciones]]
+            validas = (repetidas & (local[:posiciones] < n - 2 * longitud)
+                       & (np.minimum(5, n // 2) > longitud))
+
+            candidatas = np.flatnonzero(validas)
+            secuencias, primeras = np.unique(ids_ratio[candidatas], return_index=True)
+            inicios = candidatas[primeras]
+            patrones = ratios[inicios[:, None] + np.arange(longitud)].tolist()
+            for secuencia, patron, posicion in zip(secuencias.tolist(), patrones,
+                                                   local[inicios].tolist()):
+                encontrado[secuencia] = {
+                    'longitud': longitud,
+                    'patron': patron,
+                    'posicion': posicion
+                }
+            pendiente[secuencias] = False
+
+        detector = FractalDetector()
+        for indice, secuencia in self.grandes.items():
+            secuencia_escala = [x // escala for x in secuencia if x >= escala]
+            if len(secuencia_escala) > 10:
+                patron = detector.extraer_patron_estructural(secuencia_escala)
+                if patron:
+                    encontrado[indice] = patron
+
+        return [encontrado[indice] for indice in sorted(encontrado)]
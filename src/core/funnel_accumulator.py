@@ -0,0 +1,327 @@
+"""
+Compact per-value accumulator for funnel occurrences
+"""
+
+import bisect
+
+import numpy as np
+
+
+class FunnelStats:
+    """Running statistics for every occurrence of one funnel value"""
+
+    __slots__ = ('count', 'position_sum', 'position_min', 'position_max',
+                 'growth_sum', 'growth_min', 'growth_max', 'length_sum',
+                 'reservoir')
+
+    def __init__(self):
+        self.count = 0
+        self.position_sum = 0
+        self.position_min = None
+        self.position_max = None
+        self.growth_sum = 0.0
+        self.growth_min = None
+        self.growth_max = None
+        self.length_sum = 0
+        self.reservoir = None
+
+
+# Per-value statistics of a FunnelStats record, as block columns
+CAMPOS = ('count', 'position_sum', 'position_min', 'position_max',
+          'growth_sum', 'growth_min', 'growth_max', 'length_sum')
+
+
+class FunnelAccumulator:
+    """Counts and running statistics per funnel value, in first-seen order.
+
+    Replaces the per-occurrence dict lists of consolidate_funnels: memory is
+    one FunnelStats record per distinct value. Per-occurrence details are
+    opt-in through ``details_cap``; when positive, each value keeps the
+    occurrences with the ``details_cap`` smallest keys, a hash of the
+    occurrence and ``seed``. That is a uniform sample which does not depend
+    on the order occurrences arrive or merge in, so any shard plan or
+    worker count keeps the same details.
+
+    ``add_batch`` reduces many occurrences per value with NumPy and keeps
+    the result as a pending block of columns; ``merge`` passes pending
+    blocks on, and they are folded into the FunnelStats records once, the
+    first time ``stats`` is read.
+    """
+
+    def __init__(self, details_cap=0, seed=0):
+        self.details_cap = details_cap
+        self._stats = {}
+        self._bloques = []
+        self.total = 0
+        self.seed = seed
+
+    @property
+    def stats(self):
+        """FunnelStats record per value, in first-seen order"""
+        if self._bloques:
+            self._volcar()
+        return self._stats
+
+    def __len__(self):
+        return len(self.stats)
+
+    def __contains__(self, value):
+        return value in self.stats
+
+    def add(self, value, position, growth, sequence_len):
+        """Record one funnel occurrence"""
+        stats = self.stats.get(value)
+        if stats is None:
+            stats = self._stats[value] = FunnelStats()
+
+        stats.count += 1
+        stats.position_sum += position
+        stats.growth_sum += growth
+        stats.length_sum += sequence_len
+        if stats.count == 1:
+            stats.position_min = stats.position_max = position
+            stats.growth_min = stats.growth_max = growth
+        else:
+            stats.position_min = min(stats.position_min, position)
+            stats.position_max = max(stats.position_max, position)
+            stats.growth_min = min(stats.growth_min, growth)
+            stats.growth_max = max(stats.growth_max, growth)
+        self.total += 1
+
+        if self.details_cap:
+            self._sample(stats, (value, position, growth, sequence_len))
+
+    def add_batch(self, values, positions, growths, lengths):
+        """Record many occurrences at once (e.g. one sampling shard)
+
+        Counts, sums, minima and maxima are reduced per distinct value with
+        np.unique and ufunc.at, so the Python work is per value instead of
+        per occurrence; the sample keys are hashed and ranked in bulk too.
+        """
+        if not len(values):
+            return
+        try:
+            valores = np.asarray(values, dtype=np.uint64)
+        except OverflowError:
+            valores = np.asarray(values, dtype=object)
+        posiciones = np.asarray(positions, dtype=np.int64)
+        crecimientos = np.asarray(growths, dtype=np.float64)
+        largos = np.asarray(lengths, dtype=np.int64)
+
+        bloque, grupo = _reducir(valores, {
+            'count': np.ones(valores.size, dtype=np.int64),
+            'position_sum': posiciones, 'position_min': posiciones, 'position_max': posiciones,
+            'growth_sum': crecimientos, 'growth_min': crecimientos, 'growth_max': crecimientos,
+            'length_sum': largos,
+        })
+        if self.details_cap:
+            claves = _claves(valores, posiciones, largos, self.seed)
+            elegidos = _menores(grupo, claves, bloque['count'], self.details_cap)
+            bloque['sample'] = {'group': grupo[elegidos], 'key': claves[elegidos],
+                                'value': valores[elegidos], 'position': posiciones[elegidos],
+                                'growth': crecimientos[elegidos], 'length': largos[elegidos]}
+
+        self._bloques.append(bloque)
+        self.total += valores.size
+
+    def add_funnel(self, funnel):
+        """Record one funnel dict as produced by extract_sequence_funnels"""
+        self.add(funnel['value'], funnel['position'], funnel['growth'],
+                 funnel['sequence_len'])
+
+    def merge(self, other):
+        """Fold another accumulator into this one, keeping first-seen order"""
+        if other._stats:
+            # Our pending blocks are older than other's records: fold them first
+            if self._bloques:
+                self._volcar()
+            for value, theirs in other._stats.items():
+                self._fold(value, theirs.count, theirs.position_sum, theirs.position_min,
+                           theirs.position_max, theirs.growth_sum, theirs.growth_min,
+                           theirs.growth_max, theirs.length_sum, theirs.reservoir)
+        self._bloques.extend(other._bloques)
+        self.total += other.total
+        return self
+
+    def _volcar(self):
+        """Fold the pending blocks into the FunnelStats records"""
+        bloques, self._bloques = self._bloques, []
+        if len(bloques) == 1:
+            bloque = bloques[0]
+        else:
+            bloque, grupo = _reducir(np.concatenate([b['values'] for b in bloques]),
+                                     {campo: np.concatenate([b[campo] for b in bloques])
+                                      for campo in CAMPOS})
+            if self.details_cap:
+                # Re-rank the block samples under the merged rows
+                desplazamientos = np.cumsum([0] + [len(b['values']) for b in bloques[:-1]])
+                muestra = {campo: np.concatenate([b['sample'][campo] for b in bloques])
+                           for campo in bloques[0]['sample']}
+                muestra['group'] = grupo[np.concatenate(
+                    [b['sample']['group'] + d for b, d in zip(bloques, desplazamientos)])]
+                cuentas = np.bincount(muestra['group'], minlength=len(bloque['values']))
+                elegidos = _menores(muestra['group'], muestra['key'], cuentas, self.details_cap)
+                bloque['sample'] = {campo: datos[elegidos] for campo, datos in muestra.items()}
+
+        reservas = [None] * len(bloque['values'])
+        if self.details_cap:
+            # Selected entries come sorted by row then key: slice them per row
+            muestra = bloque['sample']
+            entradas = list(zip(muestra['key'].tolist(), muestra['value'].tolist(),
+                                muestra['position'].tolist(), muestra['growth'].tolist(),
+                                muestra['length'].tolist()))
+            limites = np.searchsorted(muestra['group'], np.arange(len(reservas) + 1)).tolist()
+            reservas = [entradas[a:b] for a, b in zip(limites[:-1], limites[1:])]
+        columnas = [bloque[campo].tolist() for campo in CAMPOS]
+        for value, reserva, *campos in zip(bloque['values'].tolist(), reservas, *columnas):
+            self._fold(value, *campos, reserva)
+
+    def _fold(self, value, count, position_sum, position_min, position_max,
+              growth_sum, growth_min, growth_max, length_sum, reservoir):
+        """Add the statistics of count occurrences of value, with their sample"""
+        mine = self._stats.get(value)
+        if mine is None:
+            mine = self._stats[value] = FunnelStats()
+            mine.position_min, mine.position_max = position_min, position_max
+            mine.growth_min, mine.growth_max = growth_min, growth_max
+        else:
+            mine.position_min = min(mine.position_min, position_min)
+            mine.position_max = max(mine.position_max, position_max)
+            mine.growth_min = min(mine.growth_min, growth_min)
+            mine.growth_max = max(mine.growth_max, growth_max)
+
+        if self.details_cap:
+            if mine.count:
+                reservoir = sorted((mine.reservoir or []) + (reservoir or []))[:self.details_cap]
+            mine.reservoir = reservoir
+
+        mine.count += count
+        mine.position_sum += position_sum
+        mine.growth_sum += growth_sum
+        mine.length_sum += length_sum
+
+    def frequency(self, value):
+        """Number of recorded occurrences of value"""
+        stats = self.stats.get(value)
+        return stats.count if stats is not None else 0
+
+    def details(self, value):
+        """Sampled occurrences of value as funnel dicts"""
+        stats = self.stats.get(value)
+        if stats is None or not stats.reservoir:
+            return []
+        return [{'value': v, 'position': p, 'growth': g, 'sequence_len': l}
+                for _, v, p, g, l in stats.reservoir]
+
+    def summary(self, value):
+        """Mean/min/max position, growth and sequence length for value"""
+        stats = self.stats[value]
+        return {
+            'frequency': stats.count,
+            'position_mean': stats.position_sum / stats.count,
+            'position_min': stats.position_min,
+            'position_max': stats.position_max,
+            'growth_mean': stats.growth_sum / stats.count,
+            'growth_min': stats.growth_min,
+            'growth_max': stats.growth_max,
+            'sequence_len_mean': stats.length_sum / stats.count,
+        }
+
+    def columns(self):
+        """Export counts and statistics as NumPy columns in first-seen order"""
+        registros = list(self.stats.values())
+        valores = list(self.stats.keys())
+        tipo_valor = np.uint64 if all(v < 2**64 for v in valores) else object
+        return {
+            'value': np.array(valores, dtype=tipo_valor),
+            'frequency': np.array([s.count for s in registros], dtype=np.int64),
+            'position_sum': np.array([s.position_sum for s in registros], dtype=np.int64),
+            'position_min': np.array([s.position_min for s in registros], dtype=np.int64),
+            'position_max': np.array([s.position_max for s in registros], dtype=np.int64),
+            'growth_sum': np.array([s.growth_sum for s in registros], dtype=np.float64),
+            'growth_min': np.array([s.growth_min for s in registros], dtype=np.float64),
+            'growth_max': np.array([s.growth_max for s in registros], dtype=np.float64),
+            'length_sum': np.array([s.length_sum for s in registros], dtype=np.int64),
+        }
+
+    def _sample(self, stats, ocurrencia):
+        """Keep ocurrencia if its key is among the details_cap smallest"""
+        value, position, _, sequence_len = ocurrencia
+        entrada = (_clave(value, position, sequence_len, self.seed),) + ocurrencia
+        if stats.reservoir is None:
+            stats.reservoir = []
+        if len(stats.reservoir) < self.details_cap:
+            bisect.insort(stats.reservoir, entrada)
+        elif entrada < stats.reservoir[-1]:
+            stats.reservoir.pop()
+            bisect.insort(stats.reservoir, entrada)
+
+
+def _reducir(valores, columnas):
+    """Reduce per-entry columns per distinct value, in first-seen order
+
+    Returns the block (values plus one reduced column per field: *_min
+    and *_max fields take the minimum and maximum, the rest are summed)
+    and the block row of every entry.
+    """
+    unicos, primeros, inversa = np.unique(valores, return_index=True, return_inverse=True)
+    orden = np.argsort(primeros, kind='stable')
+    fila = np.empty(orden.size, dtype=np.intp)
+    fila[orden] = np.arange(orden.size)
+    grupo = fila[inversa.reshape(-1)]
+
+    bloque = {'values': unicos[orden]}
+    for campo, datos in columnas.items():
+        if campo.endswith('_min'):
+            reducida = datos[primeros[orden]].copy()
+            np.minimum.at(reducida, grupo, datos)
+        elif campo.endswith('_max'):
+            reducida = datos[primeros[orden]].copy()
+            np.maximum.at(reducida, grupo, datos)
+        else:
+            reducida = np.zeros(orden.size, dtype=datos.dtype)
+            np.add.at(reducida, grupo, datos)
+        bloque[campo] = reducida
+    return bloque, grupo
+
+
+_MASCARA = 2**64 - 1
+_ORO = 0x9E3779B97F4A7C15
+
+
+def _mezclar(z):
+    """splitmix64 finalizer on a Python int below 2**64"""
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASCARA
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASCARA
+    return z ^ (z >> 31)
+
+
+def _mezclar_array(z):
+    """splitmix64 finalizer on a uint64 array; products wrap like & _MASCARA"""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _clave(value, position, sequence_len, seed):
+    """Sample key of one occurrence; the growth follows from the value"""
+    z = _mezclar((seed * _ORO + (value & _MASCARA)) & _MASCARA)
+    z = _mezclar(z ^ position)
+    return _mezclar(z ^ sequence_len)
+
+
+def _claves(valores, posiciones, largos, seed):
+    """_clave of every occurrence, as a uint64 array"""
+    if valores.dtype == object:
+        valores = np.array([v & _MASCARA for v in valores.tolist()], dtype=np.uint64)
+    z = _mezclar_array(valores + np.uint64(seed * _ORO & _MASCARA))
+    z = _mezclar_array(z ^ posiciones.astype(np.uint64))
+    return _mezclar_array(z ^ largos.astype(np.uint64))
+
+
+def _menores(grupo, claves, cuentas, cap):
+    """Indices of the cap smallest keys per group, sorted by group then key"""
+    orden = np.lexsort((claves, grupo))
+    inicios = np.cumsum(cuentas) - cuentas
+    rango = np.arange(orden.size) - inicios[grupo[orden]]
+    return orden[rango < cap]
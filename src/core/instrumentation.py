@@ -0,0 +1,243 @@
+"""
+Pipeline instrumentation: counters, stage timers and a sampling profiler
+"""
+
+import functools
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class PipelineStats:
+    """Counters, per-stage wall time and peak memory for one pipeline run.
+
+    Pass an instance as ``stats=`` to CollatzInvestigator, FunnelIdentifier
+    or FractalDetector (several may share one). Counters are bumped once
+    per trajectory or batch, never per step, and caches registered with
+    ``track_cache`` (anything with ``hits``/``misses``) are only read when
+    a snapshot is taken. Instrumentation is off by default: the classes
+    then hold ``DISABLED``, whose methods do nothing.
+    """
+
+    enabled = True
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.counters = defaultdict(int)
+        self.stages = {}
+        self.caches = {}
+        self.peak_traced = 0
+        self.profiler = None
+        self._pila = []
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def merge_counters(self, contadores):
+        """Add counters collected elsewhere (e.g. in a worker process)"""
+        for name, n in contadores.items():
+            self.counters[name] += n
+
+    def stage(self, name):
+        """Context manager that adds the wall time of a block to a stage"""
+        return _Etapa(self, name)
+
+    @property
+    def current_stage(self):
+        return self._pila[-1] if self._pila else None
+
+    def track_cache(self, name, cache):
+        self.caches[name] = cache
+
+    def peak_memory(self):
+        """Peak traced bytes when tracking memory, else the process max RSS"""
+        if tracemalloc.is_tracing():
+            return max(self.peak_traced, tracemalloc.get_traced_memory()[1])
+        if self.peak_traced:
+            return self.peak_traced
+        if resource is None:
+            return None
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in KiB on Linux and in bytes on macOS
+        return pico if sys.platform == 'darwin' else pico * 1024
+
+    def start_profiler(self, interval=0.005):
+        """Sample the calling thread's stack every interval seconds"""
+        self.profiler = SamplingProfiler(self, interval)
+        self.profiler.start()
+        return self.profiler
+
+    def stop_profiler(self):
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def as_dict(self, top=10):
+        """Snapshot of every metric as plain data"""
+        datos = {
+            'counters': dict(self.counters),
+            'stages': {name: {'calls': llamadas, 'seconds': segundos}
+                       for name, (llamadas, segundos) in self.stages.items()},
+            'caches': {name: {'hits': cache.hits, 'misses': cache.misses}
+                       for name, cache in self.caches.items()},
+            'peak_memory_bytes': self.peak_memory(),
+        }
+        if self.profiler is not None:
+            datos['profile'] = self.profiler.top(top)
+        return datos
+
+    def report(self):
+        """Print the snapshot"""
+        datos = self.as_dict()
+        print("📏 Pipeline stats:")
+        for name, etapa in datos['stages'].items():
+            print(f"   ⏱️  {name}: {etapa['seconds']:.3f}s over {etapa['calls']} calls")
+        for name, n in datos['counters'].items():
+            print(f"   🔢 {name}: {n}")
+        for name, cache in datos['caches'].items():
+            total = cache['hits'] + cache['misses']
+            tasa = cache['hits'] / total if total else 0.0
+            print(f"   💾 {name}: {cache['hits']} hits, {cache['misses']} misses ({tasa:.1%})")
+        if datos['peak_memory_bytes'] is not None:
+            print(f"   📈 Peak memory: {datos['peak_memory_bytes'] / 2**20:.1f} MiB")
+        for muestra in datos.get('profile', []):
+            print(f"   🔬 {muestra['samples']:6d}  [{muestra['stage']}] {muestra['location']}")
+
+    def reset(self):
+        self.counters.clear()
+        self.stages.clear()
+        self.peak_traced = 0
+
+
+def timed_stage(name):
+    """Method decorator: time every call as a stage of ``self.stats``"""
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            with self.stats.stage(name):
+                return metodo(self, *args, **kwargs)
+        return envoltura
+    return decorador
+
+
+class _Etapa:
+    __slots__ = ('stats', 'name', 'inicio', 'trazando')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.trazando = self.stats.track_memory and not tracemalloc.is_tracing()
+        if self.trazando:
+            tracemalloc.start()
+        self.stats._pila.append(self.name)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        transcurrido = time.perf_counter() - self.inicio
+        self.stats._pila.pop()
+        llamadas, segundos = self.stats.stages.get(self.name, (0, 0.0))
+        self.stats.stages[self.name] = (llamadas + 1, segundos + transcurrido)
+        if self.trazando:
+            # Keep the peak, then stop the tracing this outermost stage started
+            self.stats.peak_traced = max(self.stats.peak_traced,
+                                         tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return False
+
+
+class SamplingProfiler:
+    """Background thread that samples the innermost frame of one thread.
+
+    Each sample is tagged with the stats' current stage, so the hottest
+    lines can be read per stage. Costs nothing between samples.
+    """
+
+    def __init__(self, stats, interval=0.005, thread_id=None):
+        self.stats = stats
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.samples = Counter()
+        self._parar = threading.Event()
+        self._hilo = None
+
+    def start(self):
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+
+    def stop(self):
+        self._parar.set()
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def _muestrear(self):
+        while not self._parar.wait(self.interval):
+            marco = sys._current_frames().get(self.thread_id)
+            if marco is None:
+                continue
+            codigo = marco.f_code
+            ubicacion = f"{codigo.co_filename}:{marco.f_lineno} ({codigo.co_name})"
+            self.samples[(self.stats.current_stage, ubicacion)] += 1
+
+    def top(self, n=10):
+        return [{'stage': etapa, 'location': ubicacion, 'samples': cuenta}
+                for (etapa, ubicacion), cuenta in self.samples.most_common(n)]
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _DisabledStats:
+    """Stand-in used when instrumentation is off; every call is a no-op"""
+
+    enabled = False
+    current_stage = None
+    _etapa = _NullStage()
+
+    def count(self, name, n=1):
+        pass
+
+    def merge_counters(self, contadores):
+        pass
+
+    def stage(self, name):
+        return self._etapa
+
+    def track_cache(self, name, cache):
+        pass
+
+    def peak_memory(self):
+        return None
+
+    def start_profiler(self, interval=0.005):
+        return None
+
+    def stop_profiler(self):
+        pass
+
+    def as_dict(self, top=10):
+        return {}
+
+    def report(self):
+        pass
+
+    def reset(self):
+        pass
+
+
+DISABLED = _DisabledStats()
@@ -0,0 +1,128 @@
+"""
+Inverse Collatz tree (predecessor BFS) for exact basin sizes
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+# Frontier values are doubled in uint64, so they must stay below this
+VALOR_TOPE = 2**63 - 1
+
+
+class InverseTree:
+    """Enumerate the predecessors of funnel roots level by level.
+
+    The predecessors of m are 2m and, when m ≡ 4 (mod 6), the odd value
+    (m - 1) / 3. Expanding a root this way visits exactly the values whose
+    trajectory passes through it before stopping at 1. Nodes above
+    ``valor_maximo`` or deeper than ``altura_maxima`` are pruned, so a
+    basin size counts the n <= limite whose path to the root stays within
+    those bounds. At least one bound is required. The size is exact once
+    valor_maximo reaches the largest excursion of any n <= limite, but
+    that is about 1.6e9 for limite = 1e5, and the tree below it has about
+    that many nodes. A small multiple of limite, or a height of a few
+    dozen levels, is the practical range.
+
+    All roots are expanded together in one BFS, and every node is visited
+    once. Each frontier value carries the index of its root, and a shared
+    visited bitmap over [0, limite] collects the members. When a root
+    shows up inside another root's tree, that branch stops there, because
+    the inner root's own basin is added to the outer one instead.
+    """
+
+    def __init__(self, limite, valor_maximo=None, altura_maxima=None):
+        if valor_maximo is None and altura_maxima is None:
+            raise ValueError("InverseTree needs valor_maximo or altura_maxima: the exact "
+                             "bound (the largest excursion below limite) is far too large")
+        if valor_maximo is None:
+            valor_maximo = VALOR_TOPE
+        if valor_maximo > VALOR_TOPE:
+            raise ValueError("valor_maximo must stay below 2^63")
+
+        self.limite = limite
+        self.valor_maximo = valor_maximo
+        self.altura_maxima = altura_maxima
+
+    def _expandir(self, raices):
+        """One BFS from every root: (visited bitmap, own counts, enclosing root)
+
+        Own counts are the members at or below limite found by each root's
+        own branches, and enclosing[i] is the root whose tree reached root
+        i (-1 if none). With altura_maxima, heights are counted from each
+        root, so nested roots are expanded again rather than reused.
+        """
+        limite, tope = self.limite, self.valor_maximo
+        valores = np.asarray(raices, dtype=np.uint64)
+        orden = np.argsort(valores)
+        ordenadas = valores[orden]
+        reutilizar = self.altura_maxima is None
+
+        visitado = np.zeros(limite + 1, dtype=bool)
+        propias = np.zeros(valores.size, dtype=np.int64)
+        contenedora = np.full(valores.size, -1, dtype=np.int64)
+        bajo = valores <= limite
+        visitado[valores[bajo]] = True
+        propias[bajo] += 1
+
+        frontera = valores[valores <= tope]
+        etiquetas = np.flatnonzero(valores <= tope)
+        altura = 0
+
+        while frontera.size and (self.altura_maxima is None or altura < self.altura_maxima):
+            # Trajectories stop at 1, so 1 is not a predecessor of 4; without
+            # that edge every node has one successor and nothing is revisited
+            es_tercio = (frontera % 6 == 4) & (frontera != 4)
+            siguiente = np.concatenate([frontera * 2, (frontera[es_tercio] - 1) // 3])
+            etiquetas = np.concatenate([etiquetas, etiquetas[es_tercio]])
+
+            dentro = siguiente <= tope
+            siguiente, etiquetas = siguiente[dentro], etiquetas[dentro]
+
+            if reutilizar and siguiente.size:
+                # Another root: its own expansion covers the rest of this branch
+                pos = np.minimum(np.searchsorted(ordenadas, siguiente), ordenadas.size - 1)
+                es_raiz = ordenadas[pos] == siguiente
+                contenedora[orden[pos[es_raiz]]] = etiquetas[es_raiz]
+                siguiente, etiquetas = siguiente[~es_raiz], etiquetas[~es_raiz]
+
+            bajo = siguiente <= limite
+            visitado[siguiente[bajo]] = True
+            propias += np.bincount(etiquetas[bajo], minlength=valores.size)
+
+            frontera = siguiente
+            altura += 1
+
+        return visitado, propias, contenedora
+
+    def basin(self, raiz):
+        """Bitmap over [0, limite] of the values whose trajectory reaches raiz"""
+        return self._expandir([raiz])[0]
+
+    def basin_size(self, raiz):
+        """Number of n <= limite whose trajectory passes through raiz"""
+        return self.basin_sizes([raiz])[raiz]
+
+    def basin_sizes(self, raices):
+        """Basin size for many roots at once, from a single shared BFS"""
+        raices = list(dict.fromkeys(raices))
+        if not raices:
+            return {}
+        _, tamanos, contenedora = self._expandir(raices)
+
+        # Add nested basins inward-out: deepest roots first
+        interiores = defaultdict(list)
+        for i, j in enumerate(contenedora.tolist()):
+            if j >= 0:
+                interiores[j].append(i)
+        pendientes = [i for i, j in enumerate(contenedora.tolist()) if j < 0]
+        orden = []
+        while pendientes:
+            i = pendientes.pop()
+            orden.append(i)
+            pendientes.extend(interiores[i])
+        for i in reversed(orden):
+            if contenedora[i] >= 0:
+                tamanos[contenedora[i]] += tamanos[i]
+
+        return dict(zip(raices, tamanos.tolist()))
@@ -1,7 +1,10 @@
+from .trajectory_memo import get_shared_memo
+
 
 class CollatzInvestigator:
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, memo=None):
+        # Tail data (steps to 1, max) is shared instead of caching full lists
+        self.memo = memo if memo is not None else get_shared_memo()
     
     def step(self, n):
         if n % 2 == 0:
@@ -10,8 +13,9 @@ class CollatzInvestigator:
             return 3 * n + 1
     
     def sequence(self, n, max_steps=1000):
-        if n in self.cache:
-            return self.cache[n]
+        if n >= 2:
+            # Walks only until a memoized value, then splices in its stored tail
+            return self.memo.sequence(n, self.step, max_steps)
         
         seq = [n]
         current = n
@@ -22,10 +26,14 @@ class CollatzInvestigator:
             seq.append(current)
             steps += 1
         
-        self.cache[n] = seq
         return seq
     
+    def stopping_time(self, n):
+        return self.memo.resolve(n, self.step)[0]
+    
+    def max_excursion(self, n):
+        return self.memo.resolve(n, self.step)[1]
+    
     def find_funnels(self, max_range=10000):
         print('Buscando embudos hasta', max_range)
         return [2734, 4102, 6154, 9232]
-
@@ -0,0 +1,146 @@
+"""
+k-step parity-vector jump table for the Collatz step function
+"""
+
+import numpy as np
+
+K_MIN, K_MAX = 8, 20
+
+
+class JumpTable:
+    """Advance k shortcut steps with a single lookup.
+
+    For n = 2^k·h + r the first k steps of T(n) = n/2, (3n+1)/2 only depend
+    on r, so T^k(n) = 3^a(r)·h + c(r), which is k + a(r) steps of the
+    standard map. For each residue the table also keeps an affine upper
+    bound on the 3m+1 values (the local maxima of the standard sequence)
+    inside the block, so callers that only care about maxima above a
+    threshold can jump whole blocks and expand step by step only when a
+    peak could fall there.
+    """
+
+    def __init__(self, k=16):
+        if not K_MIN <= k <= K_MAX:
+            raise ValueError(f"k must be between {K_MIN} and {K_MAX}, got {k}")
+        self.k = k
+        self.mascara = (1 << k) - 1
+        self._construir()
+
+    def _construir(self):
+        """Build the residue tables with one vectorized pass per bit"""
+        k = self.k
+        valores = np.arange(1 << k, dtype=np.uint64)
+        impares = np.zeros(1 << k, dtype=np.int64)
+        pico_mult = np.zeros(1 << k, dtype=np.uint64)
+        pico_suma = np.zeros(1 << k, dtype=np.uint64)
+
+        for j in range(1, k + 1):
+            es_impar = (valores & 1).astype(bool)
+            valores = np.where(es_impar, (3 * valores + 1) >> 1, valores >> 1)
+            impares += es_impar
+
+            # After an odd step the standard map visited 3m+1 = 2·T^j(n)
+            mult = (3 ** impares).astype(np.uint64) << np.uint64(k - j + 1)
+            np.maximum(pico_mult, np.where(es_impar, mult, 0), out=pico_mult)
+            np.maximum(pico_suma, np.where(es_impar, valores << 1, 0), out=pico_suma)
+
+        # Plain lists index faster than NumPy scalars in the stepping loop
+        self.pasos = (k + impares).tolist()
+        self.mult = (3 ** impares).tolist()
+        self.suma = valores.tolist()
+        self.pico_mult = pico_mult.tolist()
+        self.pico_suma = pico_suma.tolist()
+
+    def local_maxima(self, n, max_steps=1000, umbral=0):
+        """Local maxima above umbral of the standard sequence from n
+
+        Returns (positions, values, steps) matching generar_secuencia(n,
+        max_steps) followed by extraer_maximos_locales, filtered to values
+        greater than umbral.
+        """
+        if n < 1:
+            raise ValueError("JumpTable only handles positive values")
+
+        k, mascara = self.k, self.mascara
+        posiciones, valores = [], []
+        actual, paso = n, 0
+
+        while paso < max_steps and not (actual == 1 and paso >= 1):
+            h = actual >> k
+            if h:
+                r = actual & mascara
+                bloque = self.pasos[r]
+                if (paso + bloque <= max_steps
+                        and h * self.pico_mult[r] + self.pico_suma[r] <= umbral):
+                    actual = self.mult[r] * h + self.suma[r]
+                    paso += bloque
+                    continue
+
+            if actual & 1:
+                actual = 3 * actual + 1
+                paso += 1
+                # 3m+1 is always a local maximum unless it ends the sequence
+                if actual > umbral and paso < max_steps:
+                    posiciones.append(paso)
+                    valores.append(actual)
+            else:
+                actual >>= 1
+                paso += 1
+
+        return posiciones, valores, paso
+
+    def stopping_time(self, n):
+        """Standard-map steps needed to reach 1, jumping k bits at a time"""
+        if n < 1:
+            raise ValueError("JumpTable only handles positive values")
+
+        k, mascara = self.k, self.mascara
+        actual, paso = n, 0
+
+        while actual != 1:
+            h = actual >> k
+            if h:
+                r = actual & mascara
+                actual = self.mult[r] * h + self.suma[r]
+                paso += self.pasos[r]
+            elif actual & 1:
+                actual = 3 * actual + 1
+                paso += 1
+            else:
+                actual >>= 1
+                paso += 1
+
+        return paso
+
+    def trajectory_stats(self, n):
+        """(stopping_time, max_excursion), expanding only blocks that could set a new max"""
+        if n < 1:
+            raise ValueError("JumpTable only handles positive values")
+
+        k, mascara = self.k, self.mascara
+        actual, paso, maximo = n, 0, n
+
+        while actual != 1:
+            h = actual >> k
+            if h:
+                r = actual & mascara
+                if h * self.pico_mult[r] + self.pico_suma[r] <= maximo:
+                    actual = self.mult[r] * h + self.suma[r]
+                    paso += self.pasos[r]
+                    continue
+            actual = 3 * actual + 1 if actual & 1 else actual >> 1
+            paso += 1
+            if actual > maximo:
+                maximo = actual
+
+        return paso, maximo
+
+
+_tablas = {}
+
+
+def get_jump_table(k=16):
+    """Jump table for k, built once per process"""
+    if k not in _tablas:
+        _tablas[k] = JumpTable(k)
+    return _tablas[k]
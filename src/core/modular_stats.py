@@ -0,0 +1,130 @@
+"""
+Vectorized residue-class statistics for funnel sets and trajectories
+"""
+
+import numpy as np
+
+from .batch_engine import LIMITE_UINT64
+
+# Histograms are exact for any modulus 2^k with k up to this
+K_MAXIMO = 20
+MASCARA_BASE = (1 << K_MAXIMO) - 1
+
+
+class ModularStats:
+    """Residue-class histograms, exemplars and divisibility counts.
+
+    Values (an iterable, an embudo -> frequency dict or an integer array)
+    are reduced mod 2^20 once; every modulus 2^k with k <= 20 is then a
+    mask plus ``np.bincount`` over that base residue, so several moduli
+    cost one pass each over a small integer array. Other moduli fall back
+    to ``%`` on the values. Values beyond uint64 are kept as Python ints.
+    ``weights`` (e.g. funnel frequencies) turn counts into weighted sums.
+    """
+
+    def __init__(self, valores, weights=None):
+        self.values = _como_arreglo(valores)
+        if self.values.dtype == object:
+            self.base = np.array([v & MASCARA_BASE for v in self.values], dtype=np.uint32)
+        else:
+            self.base = (self.values & np.uint64(MASCARA_BASE)).astype(np.uint32)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.values)
+
+    def classes(self, modulo=16):
+        """Residue of every value mod modulo"""
+        if modulo <= 0:
+            raise ValueError("modulo must be positive")
+        if modulo & (modulo - 1) == 0 and modulo <= 1 << K_MAXIMO:
+            return (self.base & np.uint32(modulo - 1)).astype(np.intp)
+        if self.values.dtype == object:
+            return np.array([v % modulo for v in self.values], dtype=np.intp)
+        return (self.values % np.uint64(modulo)).astype(np.intp)
+
+    def histogram(self, modulo=16):
+        """Count (or weight) per residue class, indexed by class"""
+        cuentas = np.bincount(self.classes(modulo), weights=self.weights, minlength=modulo)
+        return cuentas if self.weights is not None else cuentas.astype(np.int64)
+
+    def histograms(self, moduli=(2, 4, 8, 16, 32, 64)):
+        """One histogram per modulus"""
+        return {modulo: self.histogram(modulo) for modulo in moduli}
+
+    def distribution(self, modulo=16):
+        """Non-empty classes as a class -> count dict in class order"""
+        cuentas = self.histogram(modulo)
+        return {int(clase): cuentas[clase].item() for clase in np.flatnonzero(cuentas)}
+
+    def exemplars(self, modulo=16, count=3):
+        """First ``count`` values of every non-empty class, in input order"""
+        clases = self.classes(modulo)
+        orden = np.argsort(clases, kind='stable')
+        clases_ordenadas = clases[orden]
+        unicas, inicios = np.unique(clases_ordenadas, return_index=True)
+
+        ejemplos = {}
+        for clase, inicio in zip(unicas.tolist(), inicios.tolist()):
+            fin = inicio + count
+            elegidos = orden[inicio:fin][clases_ordenadas[inicio:fin] == clase]
+            ejemplos[clase] = [int(v) for v in self.values[elegidos]]
+        return ejemplos
+
+    def divisible_count(self, divisor):
+        """How many values are multiples of divisor"""
+        return self.histogram(divisor)[0].item()
+
+
+def transition_crosstab(starts, modulo=16, max_steps=1000):
+    """modulo x modulo counts of (v mod m -> next v mod m) along trajectories
+
+    Every start is walked in lockstep until it reaches 1 or max_steps,
+    like generar_secuencia. Lanes whose 3n+1 would overflow uint64 finish
+    with Python ints.
+    """
+    tabla = np.zeros(modulo * modulo, dtype=np.int64)
+    if isinstance(starts, np.ndarray) and starts.dtype.kind in 'iu':
+        actual = starts.astype(np.uint64)
+        exactos = []
+    else:
+        starts = [int(n) for n in starts]
+        actual = np.array([n for n in starts if n <= 2**64 - 1], dtype=np.uint64)
+        exactos = [(n, 0) for n in starts if n > 2**64 - 1]
+
+    m = np.uint64(modulo)
+    actual = actual[actual != 1]
+    paso = 0
+    while actual.size and paso < max_steps:
+        impares = (actual & np.uint64(1)).astype(bool)
+
+        desborde = impares & (actual > LIMITE_UINT64)
+        if desborde.any():
+            exactos.extend((int(v), paso) for v in actual[desborde])
+            actual, impares = actual[~desborde], impares[~desborde]
+
+        siguiente = np.where(impares, 3 * actual + np.uint64(1), actual >> np.uint64(1))
+        celdas = ((actual % m) * m + siguiente % m).astype(np.intp)
+        tabla += np.bincount(celdas, minlength=modulo * modulo)
+        actual = siguiente[siguiente != 1]
+        paso += 1
+
+    for valor, paso in exactos:
+        while valor != 1 and paso < max_steps:
+            siguiente = 3 * valor + 1 if valor % 2 else valor // 2
+            tabla[(valor % modulo) * modulo + siguiente % modulo] += 1
+            valor = siguiente
+            paso += 1
+
+    return tabla.reshape(modulo, modulo)
+
+
+def _como_arreglo(valores):
+    """Integer array of the values, object dtype when they exceed uint64"""
+    if isinstance(valores, np.ndarray) and valores.dtype.kind in 'iu':
+        return valores.astype(np.uint64, copy=False)
+    valores = [int(v) for v in valores]
+    try:
+        return np.array(valores, dtype=np.uint64)
+    except OverflowError:
+        return np.array(valores, dtype=object)
@@ -0,0 +1,67 @@
+"""
+Process-pool sharding for residue-class sampling
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def resolve_workers(workers):
+    """Number of worker processes; None means one per CPU"""
+    if workers is None:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def plan_shards(clases, muestras_por_clase, workers, fragmentos_por_worker=4, desde=None):
+    """Split each residue class's sample indices into (clase, inicio, fin) shards
+
+    Shards are listed class by class and in index order, so merging their
+    results in list order reproduces the serial iteration order exactly.
+    desde maps a class to its first index still to sample (a resumed or
+    extended run); earlier indices get no shards.
+    """
+    desde = desde or {}
+    workers = resolve_workers(workers)
+    por_clase = max(1, -(-workers * fragmentos_por_worker // len(clases)))
+    restantes = max(muestras_por_clase - desde.get(clase, 0) for clase in clases)
+    tamano = max(1, -(-restantes // por_clase))
+
+    shards = []
+    for clase in clases:
+        primero = desde.get(clase, 0)
+        for inicio in range(primero, muestras_por_clase, tamano):
+            shards.append((clase, inicio, min(inicio + tamano, muestras_por_clase)))
+        if muestras_por_clase == 0:
+            shards.append((clase, 0, 0))
+    return shards
+
+
+def iter_shards(funcion, tareas, workers):
+    """Yield funcion over tareas in task order, as each result is ready
+
+    Lets callers checkpoint or stop early; pending tasks are cancelled when
+    the generator is closed.
+    """
+    workers = resolve_workers(workers)
+    if workers == 1:
+        for tarea in tareas:
+            yield funcion(tarea)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(funcion, tarea) for tarea in tareas]
+        try:
+            for futuro in futuros:
+                yield futuro.result()
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+
+
+def map_shards(funcion, tareas, workers):
+    """Run funcion over tareas, in a process pool when workers > 1
+
+    Results come back in task order regardless of completion order.
+    """
+    return list(iter_shards(funcion, tareas, workers))
@@ -0,0 +1,185 @@
+"""
+Sieve-style stopping-time and max-excursion sweep over 1..N
+"""
+
+import numpy as np
+
+from .batch_engine import LIMITE_UINT64
+
+# Largest block handled in one vectorized pass
+BLOQUE_MAXIMO = 1 << 20
+
+
+class RangeSweep:
+    """Stopping times and maxima for every n <= N in one increasing sweep.
+
+    Once n's trajectory drops to some d < n, the rest is already known:
+    ``steps[n] = steps_to_d + steps[d]`` and ``max[n] = max(max_to_d,
+    max[d])``. For n = 2^k·h + r the first j <= k shortcut steps only
+    depend on r, so T^j(n) = 3^a·2^(k-j)·h + T^j(r). Residues whose parity
+    vector guarantees a drop within k shortcut steps (3^a < 2^j) are
+    jumped there in one shot, with the precomputed standard step count
+    and the largest 3m+1 value on the way (an affine function of h once h
+    is large enough for one step's peak to dominate). Only the remaining
+    residues, and small starts below a residue's threshold, are stepped,
+    vectorized, until they drop. Maxima are stored as uint64, which covers
+    every n below about 8.5e9.
+    """
+
+    def __init__(self, k=16):
+        self.k = k
+        self.mascara = (1 << k) - 1
+        self._construir_saltos(k)
+
+    def _construir_saltos(self, k):
+        """Per-residue jump tables for the residues that drop within k shortcut steps
+
+        rapidas[r] marks them. A start n = 2^k·h + r with h >= h_minimo[r]
+        lands on mult[r]·h + suma[r] < n after pasos[r] standard steps,
+        having peaked at pico_mult[r]·h + pico_suma[r]. h_limite[r] is the
+        largest h whose peak still fits in uint64.
+        """
+        total = 1 << k
+        residuos = np.arange(total, dtype=np.int64)
+
+        # First pass: drop step j, its image and the steepest peak line
+        valores = residuos.copy()
+        impares = np.zeros(total, dtype=np.int64)
+        rapidas = np.zeros(total, dtype=bool)
+        salto = np.zeros(total, dtype=np.int64)
+        pasos = np.zeros(total, dtype=np.int64)
+        mult = np.zeros(total, dtype=np.int64)
+        suma = np.zeros(total, dtype=np.int64)
+        # The start itself, 2^k·h + r, is the first candidate maximum
+        pico_mult = np.full(total, total, dtype=np.int64)
+        pico_suma = residuos.copy()
+
+        for j in range(1, k + 1):
+            abiertas = ~rapidas
+            es_impar = (valores & 1).astype(bool)
+            valores = np.where(es_impar, (3 * valores + 1) >> 1, valores >> 1)
+            impares += es_impar
+
+            # After an odd step the standard map visited 3m+1 = 2·T^j(n)
+            pendiente = 3 ** impares << (k - j + 1)
+            mejora = abiertas & es_impar & (pendiente > pico_mult)
+            pico_mult[mejora] = pendiente[mejora]
+            pico_suma[mejora] = 2 * valores[mejora]
+
+            nuevas = abiertas & (3 ** impares < 2 ** j)
+            rapidas |= nuevas
+            salto[nuevas] = j
+            pasos[nuevas] = j + impares[nuevas]
+            mult[nuevas] = (3 ** impares[nuevas]) << (k - j)
+            suma[nuevas] = valores[nuevas]
+
+        # Drop below n: (2^k - mult)·h > suma - r
+        margen = np.maximum(suma - residuos, -1)
+        h_minimo = np.where(rapidas, margen // np.maximum(total - mult, 1) + 1, 0)
+
+        # Second pass: the steepest line must dominate the start and every other peak
+        exceso = residuos - pico_suma
+        otra = rapidas & (pico_mult > total) & (exceso > 0)
+        corte = -(-exceso // np.maximum(pico_mult - total, 1))
+        h_minimo = np.where(otra, np.maximum(h_minimo, corte), h_minimo)
+
+        valores = residuos.copy()
+        impares = np.zeros(total, dtype=np.int64)
+        for j in range(1, k + 1):
+            es_impar = (valores & 1).astype(bool)
+            valores = np.where(es_impar, (3 * valores + 1) >> 1, valores >> 1)
+            impares += es_impar
+
+            pendiente = 3 ** impares << (k - j + 1)
+            exceso = 2 * valores - pico_suma
+            otra = rapidas & es_impar & (j <= salto) & (pendiente < pico_mult) & (exceso > 0)
+            corte = -(-exceso // np.maximum(pico_mult - pendiente, 1))
+            h_minimo = np.where(otra, np.maximum(h_minimo, corte), h_minimo)
+
+        self.rapidas = rapidas
+        self.pasos = pasos
+        self.mult = mult.astype(np.uint64)
+        self.suma = suma.astype(np.uint64)
+        self.pico_mult = pico_mult.astype(np.uint64)
+        self.pico_suma = pico_suma.astype(np.uint64)
+        self.h_minimo = h_minimo.astype(np.uint64)
+        self.h_limite = (np.uint64(2 ** 64 - 1) - self.pico_suma) // self.pico_mult
+
+    def run(self, N, previos=None, salida=None, desde=1):
+        """Return (stopping_times, maxima) arrays indexed by n, for 1 <= n <= N
+
+        previos=(tiempos, maximos) with known values for 1..M (index 0
+        unused) extends an earlier sweep: only M+1..N are computed.
+        salida=(tiempos, maximos) sweeps into caller-owned arrays of length
+        N + 1 instead (e.g. columns of a memory-mapped file); they must
+        hold 1..desde-1 already, and only desde..N is written.
+        """
+        if salida is None:
+            tiempos = np.full(N + 1, -1, dtype=np.int32)
+            maximos = np.zeros(N + 1, dtype=np.uint64)
+        else:
+            tiempos, maximos = salida
+            # -1 marks the values still pending
+            tiempos[desde:N + 1] = -1
+        if N >= 1 and desde <= 1:
+            tiempos[1] = 0
+            maximos[1] = 1
+
+        lo = max(desde, 2)
+        if previos is not None:
+            hasta = min(len(previos[0]), N + 1)
+            tiempos[1:hasta] = previos[0][1:hasta]
+            maximos[1:hasta] = previos[1][1:hasta]
+            lo = max(hasta, 2)
+
+        while lo <= N:
+            hi = min(2 * lo, lo + BLOQUE_MAXIMO, N + 1)
+            n = np.arange(lo, hi, dtype=np.uint64)
+            destino, pasos, tope = self._descender(n)
+
+            # Each d < n, so every round resolves at least the smallest pending n
+            pendientes = np.arange(n.size)
+            while pendientes.size:
+                listos = tiempos[destino[pendientes]] >= 0
+                i = pendientes[listos]
+                tiempos[n[i]] = pasos[i] + tiempos[destino[i]]
+                maximos[n[i]] = np.maximum(tope[i], maximos[destino[i]])
+                pendientes = pendientes[~listos]
+
+            lo = hi
+
+        return tiempos, maximos
+
+    def _descender(self, n):
+        """A value below each start, standard steps to reach it and max on the way"""
+        r = (n & np.uint64(self.mascara)).astype(np.intp)
+        h = n >> np.uint64(self.k)
+        saltan = self.rapidas[r] & (h >= self.h_minimo[r]) & (h <= self.h_limite[r])
+
+        # Quick residues jump straight to their drop...
+        i = np.flatnonzero(saltan)
+        ri, hi = r[i], h[i]
+        destino = n.copy()
+        pasos = np.zeros(n.size, dtype=np.int64)
+        tope = n.copy()
+        destino[i] = self.mult[ri] * hi + self.suma[ri]
+        pasos[i] = self.pasos[ri]
+        tope[i] = self.pico_mult[ri] * hi + self.pico_suma[ri]
+
+        # ...only the other residues and small starts are stepped until they drop
+        self._avanzar(n, destino, pasos, tope, np.flatnonzero(~saltan))
+
+        return destino, pasos, tope
+
+    def _avanzar(self, n, v, c, m, activos):
+        """Shortcut-step lanes in place until they drop below their start"""
+        while activos.size:
+            actual = v[activos]
+            impar = (actual & 1).astype(bool)
+            if (actual[impar] > LIMITE_UINT64).any():
+                raise OverflowError("trajectory value does not fit in uint64")
+            subida = 3 * actual + 1
+            v[activos] = np.where(impar, subida >> 1, actual >> 1)
+            c[activos] += np.where(impar, 2, 1)
+            m[activos] = np.maximum(m[activos], np.where(impar, subida, 0))
+            activos = activos[v[activos] >= n[activos]]
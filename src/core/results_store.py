@@ -0,0 +1,171 @@
+"""
+Columnar on-disk results: funnels and connections as memory-mapped .npy
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+VERSION_FORMATO = 1
+
+# Column files of a results directory, by attribute name
+COLUMNAS = {
+    'values': 'funnel_values.npy',
+    'frequencies': 'funnel_frequencies.npy',
+    'class_mod_16': 'funnel_class_mod_16.npy',
+    'edge_from': 'edge_from.npy',
+    'edge_to': 'edge_to.npy',
+    'edge_steps': 'edge_steps.npy',
+    'path_offsets': 'path_offsets.npy',
+    'path_values': 'path_values.npy',
+}
+
+
+class ResultsStore:
+    """Funnels and connections stored as one .npy file per column.
+
+    Funnels are three aligned columns (value, frequency, value mod 16) in
+    ranking order. Connections are an edge list (from, to, steps) plus
+    their paths in CSR form: path i is
+    ``path_values[path_offsets[i]:path_offsets[i + 1]]``. ``meta.json``
+    holds the format version, row counts and timestamp. Opening a store
+    memory-maps every column (``mmap=False`` reads them into memory), so
+    loading millions of funnels is instant and the pages are shared
+    between processes. JSON stays available through ``to_json``.
+    """
+
+    def __init__(self, directory, mmap=True):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('format_version') != VERSION_FORMATO:
+            raise ValueError(f"{directory} uses results format "
+                             f"{self.meta.get('format_version')}, expected {VERSION_FORMATO}")
+
+        modo = 'r' if mmap else None
+        for atributo, archivo in COLUMNAS.items():
+            setattr(self, atributo, np.load(os.path.join(directory, archivo), mmap_mode=modo))
+
+    def __len__(self):
+        return len(self.values)
+
+    @classmethod
+    def write(cls, directory, embudos, conexiones=(), timestamp=None):
+        """Write embudo -> frequency and connection dicts as a results directory
+
+        Raises OverflowError, before anything is written, when a value does
+        not fit the uint64 columns.
+        """
+        valores = np.fromiter(embudos.keys(), dtype=np.uint64, count=len(embudos))
+        conexiones = list(conexiones)
+        caminos = [c.get('camino', [c['desde'], c['hacia']]) for c in conexiones]
+        desplazamientos = np.zeros(len(caminos) + 1, dtype=np.int64)
+        np.cumsum([len(camino) for camino in caminos], out=desplazamientos[1:])
+
+        columnas = {
+            'values': valores,
+            'frequencies': np.fromiter(embudos.values(), dtype=np.int64, count=len(embudos)),
+            'class_mod_16': (valores % np.uint64(16)).astype(np.uint8),
+            'edge_from': np.array([c['desde'] for c in conexiones], dtype=np.uint64),
+            'edge_to': np.array([c['hacia'] for c in conexiones], dtype=np.uint64),
+            'edge_steps': np.array([c['pasos'] for c in conexiones], dtype=np.int32),
+            'path_offsets': desplazamientos,
+            'path_values': np.array([v for camino in caminos for v in camino], dtype=np.uint64),
+        }
+        meta = {
+            'format_version': VERSION_FORMATO,
+            'funnels': len(valores),
+            'connections': len(conexiones),
+            'timestamp': timestamp if timestamp is not None else np.datetime64('now').astype(str),
+        }
+
+        # The store is built in a sibling directory and swapped in once
+        # complete, so a reader never sees a half-written store
+        temporal = directory.rstrip(os.sep) + '.tmp'
+        shutil.rmtree(temporal, ignore_errors=True)
+        os.makedirs(temporal)
+        for atributo, archivo in COLUMNAS.items():
+            np.save(os.path.join(temporal, archivo), columnas[atributo])
+        with open(os.path.join(temporal, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        _reemplazar_directorio(temporal, directory)
+        return cls(directory)
+
+    def embudos(self):
+        """Funnels as an embudo -> frequency dict, in stored order"""
+        return dict(zip(self.values.tolist(), self.frequencies.tolist()))
+
+    def path(self, i):
+        return self.path_values[self.path_offsets[i]:self.path_offsets[i + 1]]
+
+    def conexiones(self):
+        """Connections as the dicts analizar_conectividad returns"""
+        return [{
+            'desde': desde,
+            'hacia': hacia,
+            'pasos': pasos,
+            'camino': self.path(i).tolist()
+        } for i, (desde, hacia, pasos) in enumerate(zip(self.edge_from.tolist(),
+                                                        self.edge_to.tolist(),
+                                                        self.edge_steps.tolist()))]
+
+    def to_json(self, archivo):
+        """Export in the indented JSON layout guardar_resultados used to write"""
+        resultados = {
+            'embudos': self.embudos(),
+            'conexiones': self.conexiones(),
+            'timestamp': self.meta['timestamp']
+        }
+        with open(archivo, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+    @classmethod
+    def from_json(cls, archivo, directory):
+        """Convert a JSON results file into a results directory"""
+        with open(archivo) as f:
+            datos = json.load(f)
+        embudos = {int(k): v for k, v in _campo(datos, 'embudos', 'funnels').items()}
+        conexiones = [_conexion(c) for c in _campo(datos, 'conexiones', 'connections', default=[])]
+        return cls.write(directory, embudos, conexiones, datos.get('timestamp'))
+
+
+def load_funnels(base):
+    """(values, frequencies) arrays from the results directory base, else base + '.json'"""
+    if os.path.exists(os.path.join(base, 'meta.json')):
+        store = ResultsStore(base)
+        return store.values, store.frequencies
+
+    with open(base + '.json') as f:
+        datos = json.load(f)
+    embudos = _campo(datos, 'embudos', 'funnels')
+    valores = [int(k) for k in embudos.keys()]
+    return np.array(valores, dtype=np.uint64), np.array(list(embudos.values()), dtype=np.int64)
+
+
+def _campo(datos, *nombres, default=None):
+    """First present key among the Spanish and English result layouts"""
+    for nombre in nombres:
+        if nombre in datos:
+            return datos[nombre]
+    if default is not None:
+        return default
+    raise KeyError(nombres[0])
+
+
+def _conexion(c):
+    if 'desde' in c:
+        return c
+    return {'desde': c['from'], 'hacia': c['to'], 'pasos': c['steps'],
+            'camino': c.get('path', [c['from'], c['to']])}
+
+
+def _reemplazar_directorio(nuevo, destino):
+    """Move the finished directory nuevo to destino, replacing any previous store"""
+    anterior = destino.rstrip(os.sep) + '.old'
+    shutil.rmtree(anterior, ignore_errors=True)
+    if os.path.exists(destino):
+        os.replace(destino, anterior)
+    os.replace(nuevo, destino)
+    shutil.rmtree(anterior, ignore_errors=True)
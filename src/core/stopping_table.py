@@ -0,0 +1,128 @@
+"""
+Persistent memory-mapped stopping-time and max-excursion table
+"""
+
+import os
+import struct
+
+import numpy as np
+
+from .range_sweep import RangeSweep
+
+MAGIA = b'CLZSTOP1'
+TAMANO_CABECERA = 64
+# magic, first n, row count, steps dtype, max dtype
+_FORMATO_CABECERA = '<8sQQ8s8s'
+FILA = np.dtype([('steps', '<i4'), ('max', '<u8')])
+
+
+class StoppingTable:
+    """Stopping time and max excursion for every n in [first, last], on disk.
+
+    The file is a 64-byte header (magic, first n, row count, column dtypes)
+    followed by one packed (steps, max) row per n. Opening it maps the rows
+    with np.memmap, so any number of processes can share it read-only
+    without copying. Build it once with ``build`` and grow it with
+    ``extend``; only the new values are computed.
+    """
+
+    def __init__(self, path, mode='r'):
+        self.path = path
+        self.mode = mode
+        self._abrir()
+
+    def _abrir(self):
+        with open(self.path, 'rb') as f:
+            magia, primero, cantidad, tipo_pasos, tipo_max = struct.unpack(
+                _FORMATO_CABECERA, f.read(struct.calcsize(_FORMATO_CABECERA)))
+        if magia != MAGIA:
+            raise ValueError(f"{self.path} is not a stopping-time table")
+        if (np.dtype(tipo_pasos.rstrip(b'\0').decode()) != FILA['steps']
+                or np.dtype(tipo_max.rstrip(b'\0').decode()) != FILA['max']):
+            raise ValueError(f"{self.path} uses unsupported column dtypes")
+
+        self.first = primero
+        self.count = cantidad
+        if cantidad:
+            self.rows = np.memmap(self.path, dtype=FILA, mode=self.mode,
+                                  offset=TAMANO_CABECERA, shape=(cantidad,))
+        else:
+            self.rows = np.zeros(0, dtype=FILA)
+
+    @property
+    def last(self):
+        return self.first + self.count - 1
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, n):
+        return self.first <= n <= self.last
+
+    def lookup(self, n):
+        """(steps, max) for n, or None when n is outside the table"""
+        if not self.first <= n <= self.last:
+            return None
+        fila = self.rows[n - self.first]
+        return int(fila['steps']), int(fila['max'])
+
+    @property
+    def steps(self):
+        """Stopping-time column as a read-only view, row i is n = first + i"""
+        return self.rows['steps']
+
+    @property
+    def maxima(self):
+        """Max-excursion column as a read-only view, row i is n = first + i"""
+        return self.rows['max']
+
+    @classmethod
+    def build(cls, path, N, k=16):
+        """Compute 1..N with a RangeSweep and write a new table file"""
+        directorio = os.path.dirname(path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        with open(path, 'wb') as f:
+            f.write(_cabecera(1, 0))
+        return cls(path).extend(N, k=k)
+
+    def extend(self, N, k=16):
+        """Append rows up to N, sweeping only the values not yet stored
+
+        The file is grown to its new size first and the sweep writes
+        straight into a writable mapping of it, so neither the stored nor
+        the new rows are copied into memory. The header only counts the
+        new rows once they are all written.
+        """
+        if N <= self.last:
+            return self
+        if self.first != 1:
+            raise ValueError("only tables starting at n = 1 can be extended")
+
+        anterior = self.last
+        # Drop the mapping before growing the file underneath it
+        self.rows = None
+        with open(self.path, 'r+b') as f:
+            f.truncate(TAMANO_CABECERA + N * FILA.itemsize)
+
+        # Map one row early so row i is n = i, as RangeSweep indexes its
+        # arrays; that row lies on the header padding and is never accessed
+        filas = np.memmap(self.path, dtype=FILA, mode='r+',
+                          offset=TAMANO_CABECERA - FILA.itemsize, shape=(N + 1,))
+        RangeSweep(k).run(N, salida=(filas['steps'], filas['max']), desde=anterior + 1)
+        filas.flush()
+        del filas
+
+        with open(self.path, 'r+b') as f:
+            f.write(_cabecera(1, N))
+
+        self._abrir()
+        return self
+
+
+def _cabecera(primero, cantidad):
+    cabecera = struct.pack(_FORMATO_CABECERA, MAGIA, primero, cantidad,
+                           FILA['steps'].str.encode(), FILA['max'].str.encode())
+    return cabecera.ljust(TAMANO_CABECERA, b'\0')
+
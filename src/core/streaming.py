@@ -0,0 +1,60 @@
+"""
+Streaming local-maxima extraction for Collatz trajectories
+"""
+
+from .bigint import UMBRAL_GRANDE, get_big_walker
+
+
+class PeakStream:
+    """Iterate over the local maxima of n's trajectory as it is generated.
+
+    Yields ``(value, position, growth)`` with a three-value sliding window,
+    so memory stays O(1) per trajectory. The walk stops at 1 or after
+    ``max_steps`` like ``generar_secuencia`` and
+    ``generate_detailed_sequence`` do for positive starts. When
+    ``growth_threshold`` is given only peaks with
+    ``value > previous * growth_threshold`` are yielded. After the stream is
+    exhausted ``length`` holds the length the full sequence would have had.
+    Starts beyond uint64 are walked by a BigPeakWalk, which skips the
+    halvings between maxima.
+    """
+
+    def __init__(self, n, max_steps=1000, growth_threshold=None):
+        self.n = n
+        self.max_steps = max_steps
+        self.growth_threshold = growth_threshold
+        self.length = None
+
+    def __iter__(self):
+        threshold = self.growth_threshold
+        if self.n > UMBRAL_GRANDE:
+            yield from self._iter_big(threshold)
+            return
+        previous, current = None, self.n
+        position = 0
+
+        while position < self.max_steps and not (position >= 1 and current == 1):
+            following = 3 * current + 1 if current % 2 else current // 2
+
+            if (position >= 1 and current > previous and current > following
+                    and (threshold is None or current > previous * threshold)):
+                yield current, position, current / previous
+
+            previous, current = current, following
+            position += 1
+
+        self.length = position + 1
+
+    def _iter_big(self, threshold):
+        walk = get_big_walker().peaks(self.n, self.max_steps)
+        for current, position, previous in walk:
+            growth = current / previous
+            if threshold is None or growth > threshold:
+                yield current, position, growth
+        self.length = walk.length
+
+
+def iter_local_maxima(n, max_steps=1000):
+    """Yield the local maxima values of n's trajectory in order"""
+    for value, _, _ in PeakStream(n, max_steps):
+        yield value
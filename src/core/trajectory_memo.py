@@ -0,0 +1,228 @@
+"""
+Shared, bounded memo of Collatz trajectory tails
+"""
+
+import sys
+from collections import OrderedDict
+
+from .bigint import UMBRAL_GRANDE, get_big_walker
+
+# Approximate per-entry cost of the OrderedDict links and hash slot
+_SOBRECARGA_ENTRADA = 104
+
+
+def collatz_step(n):
+    """Standard Collatz step"""
+    return n // 2 if n % 2 == 0 else 3 * n + 1
+
+
+class TrajectoryMemo:
+    """LRU memo of tail information keyed by trajectory value.
+
+    Each entry stores ``(steps_to_1, max_so_far, merge_point, segment,
+    index)`` for a value instead of its full sequence: the number of steps
+    needed to reach 1, the largest value visited on the way (including the
+    value itself), the already-known value where its walk joined previously
+    memoized data, and the tuple of values walked in that pass with the
+    value's index in it. Values walked together share one segment, so the
+    values after n are n's segment tail, its merge point, that value's
+    segment tail and so on. Entries are evicted least-recently-used first
+    once the estimated size exceeds ``max_bytes``. An attached
+    StoppingTable is consulted by ``resolve`` before the memo and before
+    stepping, and its rows are never copied in.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, table=None):
+        self.max_bytes = max_bytes
+        self.entradas = OrderedDict()
+        self.bytes_usados = 0
+        self.hits = 0
+        self.misses = 0
+        self.table = table
+        self.table_hits = 0
+
+    def attach_table(self, table):
+        """Consult a StoppingTable (or None to detach) before computing"""
+        self.table = table
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def __contains__(self, n):
+        return n in self.entradas
+
+    def get(self, n):
+        """Return the (steps, max, merge, segment, index) entry for n, or None"""
+        entrada = self.entradas.get(n)
+        if entrada is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entradas.move_to_end(n)
+        return entrada
+
+    def put(self, n, pasos, maximo, union, tramo=None, indice=0):
+        """Store tail information for n, evicting old entries if needed"""
+        if n in self.entradas:
+            self.entradas.move_to_end(n)
+            return
+        entrada = (pasos, maximo, union, tramo, indice)
+        self.entradas[n] = entrada
+        self.bytes_usados += self._tamano_entrada(n, entrada)
+
+        while self.bytes_usados > self.max_bytes and self.entradas:
+            viejo, datos = self.entradas.popitem(last=False)
+            self.bytes_usados -= self._tamano_entrada(viejo, datos)
+
+    def resolve(self, n, step=collatz_step):
+        """Return (steps_to_1, max_so_far) for n, walking only unknown values
+
+        With the standard step, starts beyond uint64 are walked by BigWalker
+        until they drop below it; those huge values are not memoized.
+        """
+        if n < 1:
+            raise ValueError("TrajectoryMemo only handles positive values")
+
+        if n > UMBRAL_GRANDE and step is collatz_step:
+            # Big starts: shift-and-skip down to uint64 range without memoizing
+            pasos, maximo, resto = get_big_walker().descend(n, UMBRAL_GRANDE)
+            resto_pasos, resto_maximo = self.resolve(resto, step)
+            return pasos + resto_pasos, max(maximo, resto_maximo)
+
+        tabla = self.table
+        if tabla is not None and n in tabla:
+            self.table_hits += 1
+            return tabla.lookup(n)
+
+        entrada = self.get(n)
+        if entrada is not None:
+            return entrada[0], entrada[1]
+
+        camino = []
+        actual = n
+        while actual != 1:
+            camino.append(actual)
+            actual = step(actual)
+            if tabla is not None and actual in tabla:
+                self.table_hits += 1
+                entrada = tabla.lookup(actual) + (actual,)
+                break
+            entrada = self.get(actual)
+            if entrada is not None:
+                break
+        else:
+            entrada = (0, 1, 1)
+
+        return self._backfill(camino, actual, entrada[0], entrada[1])
+
+    def sequence(self, n, step=collatz_step, max_steps=1000):
+        """n's trajectory (n >= 2) as a list, down to 1 or for max_steps steps
+
+        Steps only until the walk meets a memoized value, then splices in
+        that value's stored tail instead of recomputing it; the stepped
+        prefix is stored as a new segment. A walk that revisits a value
+        stops after the repeat, like generar_secuencia.
+        """
+        if n < 2:
+            raise ValueError("TrajectoryMemo.sequence handles starts n >= 2")
+
+        camino = []
+        vistos = set()
+        actual = n
+        entrada = self.get(actual)
+        while entrada is None and actual != 1 and len(camino) < max_steps:
+            if actual in vistos:
+                return camino + [actual]
+            vistos.add(actual)
+            camino.append(actual)
+            actual = step(actual)
+            entrada = self.get(actual)
+
+        if entrada is None and actual != 1:
+            return camino + [actual]
+
+        if entrada is None:
+            self._backfill(camino, 1, 0, 1)
+            return camino + [1]
+
+        self._backfill(camino, actual, entrada[0], entrada[1])
+        secuencia = camino + [actual]
+        self._extend_tail(secuencia, entrada, max_steps + 1)
+        # The stored tail stops early where a merge point was evicted
+        while secuencia[-1] != 1 and len(secuencia) <= max_steps:
+            secuencia.append(step(secuencia[-1]))
+        return secuencia
+
+    def _extend_tail(self, secuencia, entrada, limite):
+        """Append the stored values after entrada's value until limite values"""
+        entradas = self.entradas
+        if len(secuencia) + entrada[0] < limite:
+            # The whole tail fits: copy segment tails without counting
+            while entrada is not None and entrada[3] is not None:
+                _, _, union, tramo, indice = entrada
+                secuencia.extend(tramo[indice + 1:])
+                secuencia.append(union)
+                if union == 1:
+                    return
+                entrada = entradas.get(union)
+                if entrada is not None:
+                    entradas.move_to_end(union)
+            return
+
+        while entrada is not None and entrada[3] is not None:
+            _, _, union, tramo, indice = entrada
+            secuencia.extend(tramo[indice + 1:indice + 1 + limite - len(secuencia)])
+            if len(secuencia) >= limite:
+                return
+            secuencia.append(union)
+            if union == 1:
+                return
+            entrada = entradas.get(union)
+            if entrada is not None:
+                entradas.move_to_end(union)
+
+    def _backfill(self, camino, union, pasos, maximo):
+        """Store the walked prefix as one segment that joins the known tail at union"""
+        tramo = tuple(camino)
+        for indice in range(len(tramo) - 1, -1, -1):
+            valor = tramo[indice]
+            pasos += 1
+            if valor > maximo:
+                maximo = valor
+            self.put(valor, pasos, maximo, union, tramo, indice)
+        return pasos, maximo
+
+    def clear(self):
+        """Drop every entry and reset counters"""
+        self.entradas.clear()
+        self.bytes_usados = 0
+        self.hits = 0
+        self.misses = 0
+        self.table_hits = 0
+
+    def _tamano_entrada(self, n, entrada):
+        pasos, maximo, union, tramo, indice = entrada
+        tamano = (sys.getsizeof(n) + sys.getsizeof(entrada) + sys.getsizeof(pasos)
+                  + sys.getsizeof(maximo) + sys.getsizeof(union) + _SOBRECARGA_ENTRADA)
+        if tramo is not None and indice == 0:
+            # Values of a segment share its tuple; the first one carries its cost
+            tamano += sys.getsizeof(tramo)
+        return tamano
+
+
+_memo_compartido = None
+
+
+def get_shared_memo():
+    """Process-wide memo shared by every investigator"""
+    global _memo_compartido
+    if _memo_compartido is None:
+        _memo_compartido = TrajectoryMemo()
+    return _memo_compartido
+
+
+def configure_shared_memo(max_bytes, table=None):
+    """Replace the shared memo with one bounded by max_bytes"""
+    global _memo_compartido
+    _memo_compartido = TrajectoryMemo(max_bytes=max_bytes, table=table)
+    return _memo_compartido
@@ -5,68 +5,206 @@ Advanced funnel identification and analysis
 import numpy as np
 from collections import defaultdict
 
+from .core.batch_engine import BatchTrajectoryEngine
+from .core.census import FunnelCensus
+from .core.checkpoint import SamplingCheckpoint
+from .core.factorization import get_factorizer
+from .core.funnel_accumulator import FunnelAccumulator
+from .core.instrumentation import DISABLED, PipelineStats, timed_stage
+from .core.inverse_tree import InverseTree
+from .core.parallel import iter_shards, plan_shards
+from .core.streaming import PeakStream
+from .core.trajectory_memo import get_shared_memo
+
 class FunnelIdentifier:
-    def __init__(self):
+    def __init__(self, memo=None, details_cap=0, stats=None):
         self.detailed_funnels = {}
+        self.memo = memo if memo is not None else get_shared_memo()
+        # Per-occurrence details are opt-in: keep at most this many per value
+        self.details_cap = details_cap
+        self.accumulator = FunnelAccumulator(details_cap)
+        self.engine = BatchTrajectoryEngine()
+        # PipelineStats to record counters and stage timings (off by default)
+        self.stats = stats if stats is not None else DISABLED
+        self.stats.track_cache('trajectory_memo', self.memo)
+        
+    @timed_stage('identify_funnels_advanced')
+    def identify_funnels_advanced(self, max_range=100000, samples=2000, workers=1,
+                                  checkpoint=None, checkpoint_interval=30.0):
+        """Advanced funnel identification with detailed analysis
         
-    def identify_funnels_advanced(self, max_range=100000, samples=2000):
-        """Advanced funnel identification with detailed analysis"""
+        workers > 1 shards each modular class into sub-ranges over a
+        process pool (None = one per CPU); results, sampled details
+        included, match the serial run.
+        checkpoint is a file to save the accumulator and sampling cursors
+        to every checkpoint_interval seconds; rerunning with it resumes,
+        and a larger samples only walks the new ones (see
+        CollatzInvestigator.identificar_embudos).
+        """
         print("🎯 Advanced funnel identification...")
         
         # Sample from different modular classes
         modular_classes = list(range(1, 16, 2))  # Odd classes
-        funnels_by_class = defaultdict(list)
+        funnels_by_class = defaultdict(int)
+        accumulator = FunnelAccumulator(self.details_cap)
         
-        for cls in modular_classes:
-            class_funnels = self.sample_modular_class(cls, max_range, samples // 8)
-            funnels_by_class[cls] = class_funnels
-            
-            print(f"   Class {cls}: {len(class_funnels)} funnels")
+        control = None
+        if checkpoint is not None:
+            control = SamplingCheckpoint(checkpoint, {'run': 'identify_funnels_advanced',
+                                                      'max_range': max_range,
+                                                      'details_cap': self.details_cap},
+                                         checkpoint_interval)
+            if control.load():
+                control.check_samples(samples // 8)
+                accumulator, previous = control.state
+                funnels_by_class.update(previous)
+                print(f"♻️  Resuming from {checkpoint}")
+        
+        shards = plan_shards(modular_classes, samples // 8, workers,
+                             desde=control.cursors if control is not None else None)
+        tasks = [(cls, start, end, max_range, self.details_cap, self.stats.enabled)
+                 for cls, start, end in shards]
         
-        # Consolidate results
-        all_funnels = []
-        for cls, funnels in funnels_by_class.items():
-            all_funnels.extend(funnels)
+        # Shards come back in order, so merging keeps serial first-seen order
+        results = iter_shards(_sample_shard, tasks, workers)
+        for (cls, _, end), (shard, counters) in zip(shards, results):
+            funnels_by_class[cls] += shard.total
+            accumulator.merge(shard)
+            self.stats.merge_counters(counters)
+            if control is not None:
+                control.advance(cls, end, (accumulator, funnels_by_class))
+        if control is not None:
+            control.save()
+        
+        for cls in modular_classes:
+            print(f"   Class {cls}: {funnels_by_class[cls]} funnels")
         
         # Remove duplicates and sort by frequency
-        consolidated_funnels = self.consolidate_funnels(all_funnels)
+        self.accumulator = accumulator
+        consolidated_funnels = self.consolidate_funnels(accumulator)
         
         self.detailed_funnels = consolidated_funnels
         return consolidated_funnels
     
-    def sample_modular_class(self, cls, max_range, samples):
-        """Sample from specific modular class"""
+    @timed_stage('census_funnels')
+    def census_funnels(self, max_n, directory='results/census_funnels', mode='exhaustive',
+                       chunk_size=1_000_000, samples_per_chunk=None, workers=1, seed=0,
+                       variant='C'):
+        """Funnel census over every odd start up to max_n instead of sampling
+        
+        Every local maximum passes the 2x growth test (3m+1 > 2m), so the
+        census counts all of them. Chunk counters are kept on disk and the
+        run resumes after interruption. Output matches consolidate_funnels,
+        with empty 'details'. variant picks the map the census engine
+        advances with (see BatchTrajectoryEngine); the counts do not change.
+        """
+        census = FunnelCensus(max_n, directory, chunk_size=chunk_size, mode=mode,
+                              samples_per_chunk=samples_per_chunk, seed=seed, factor=0,
+                              variant=variant)
+        census.run(workers=workers)
+        
+        frequencies = census.embudos(top=None, min_frequency=5)  # Minimum frequency threshold
+        self.detailed_funnels = {value: {
+            'frequency': freq,
+            'details': [],
+            'class_mod_16': value % 16,
+            'class_mod_8': value % 8,
+            'is_power_of_2': self.is_power_of_two(value)
+        } for value, freq in frequencies.items()}
+        return self.detailed_funnels
+    
+    def sample_modular_class(self, cls, max_range, samples, start=0):
+        """Sample from specific modular class, sample indices [start, start + samples)"""
         class_funnels = []
         
-        for i in range(samples):
+        for i in range(start, start + samples):
             n = cls + 16 * (i % (max_range // 16))
             if n > max_range:
                 continue
                 
-            sequence = self.generate_detailed_sequence(n)
-            sequence_funnels = self.extract_sequence_funnels(sequence)
-            class_funnels.extend(sequence_funnels)
+            class_funnels.extend(self.stream_sequence_funnels(n))
         
         return class_funnels
     
+    def accumulate_modular_class(self, cls, max_range, samples, start=0, accumulator=None):
+        """Like sample_modular_class, but feeding the peaks into a FunnelAccumulator
+        
+        The sampled starts are walked together by the batch engine and
+        their peaks added as one batch, which the accumulator reduces per
+        value with NumPy. Every local maximum m follows an odd value
+        (m - 1) / 3, so each peak passes the 2x growth test.
+        """
+        if accumulator is None:
+            accumulator = FunnelAccumulator(self.details_cap)
+        
+        starts = [n for n in (cls + 16 * (i % (max_range // 16))
+                              for i in range(start, start + samples))
+                  if n <= max_range]
+        if not starts:
+            return accumulator
+        
+        result = self.engine.run_flat(starts)
+        values = result['values']
+        accumulator.add_batch(values, result['positions'], _peak_growths(values),
+                              result['steps'][result['lanes']] + 1)
+        self.stats.count('trajectories', len(starts))
+        self.stats.count('steps', int(result['steps'].sum()))
+        return accumulator
+    
     def generate_detailed_sequence(self, n, max_steps=1000):
-        """Generate detailed Collatz sequence"""
-        sequence = [n]
-        current = n
-        
-        for step in range(max_steps):
-            if current % 2 == 0:
-                current = current // 2
-            else:
-                current = 3 * current + 1
-            
-            sequence.append(current)
+        """Generate detailed Collatz sequence
+        
+        Starts n >= 2 reuse the stored tail of the first value already in
+        the shared memo.
+        """
+        if n >= 2:
+            sequence = self.memo.sequence(n, max_steps=max_steps)
+        else:
+            sequence = [n]
+            current = n
             
-            if current == 1:
-                break
+            for step in range(max_steps):
+                if current % 2 == 0:
+                    current = current // 2
+                else:
+                    current = 3 * current + 1
+                
+                sequence.append(current)
+                
+                if current == 1:
+                    break
         
+        self.stats.count('trajectories')
+        self.stats.count('steps', len(sequence) - 1)
         return sequence
     
+    def stopping_time(self, n):
+        """Steps needed to reach 1, using the shared trajectory memo"""
+        return self.memo.resolve(n)[0]
+    
+    def max_excursion(self, n):
+        """Largest value on the way to 1, using the shared trajectory memo"""
+        return self.memo.resolve(n)[1]
+    
+    def iter_sequence_funnels(self, n, growth_threshold=2.0, max_steps=1000):
+        """Stream (value, position, growth) funnel peaks while n's sequence is generated"""
+        return PeakStream(n, max_steps, growth_threshold)
+    
+    def stream_sequence_funnels(self, n, growth_threshold=2.0, max_steps=1000):
+        """Same result as extract_sequence_funnels(generate_detailed_sequence(n)),
+        holding only the peaks instead of the whole sequence"""
+        stream = self.iter_sequence_funnels(n, growth_threshold, max_steps)
+        peaks = list(stream)
+        self.stats.count('trajectories')
+        self.stats.count('steps', stream.length - 1)
+        
+        return [{
+            'value': value,
+            'position': position,
+            'growth': growth,
+            'sequence_len': stream.length
+        } for value, position, growth in peaks]
+    
     def extract_sequence_funnels(self, sequence, growth_threshold=2.0):
         """Extract funnels from sequence"""
         funnels = []
@@ -88,23 +226,29 @@ class FunnelIdentifier:
         
         return funnels
     
+    @timed_stage('consolidate_funnels')
     def consolidate_funnels(self, all_funnels):
-        """Consolidate funnels from all samples"""
-        frequency = defaultdict(int)
-        details = defaultdict(list)
+        """Consolidate funnels from all samples
         
-        for funnel in all_funnels:
-            value = funnel['value']
-            frequency[value] += 1
-            details[value].append(funnel)
+        Accepts a FunnelAccumulator or a list of funnel dicts. 'details'
+        holds the reservoir-sampled occurrences (empty unless details_cap
+        is set); running statistics stay available on the accumulator.
+        """
+        if isinstance(all_funnels, FunnelAccumulator):
+            accumulator = all_funnels
+        else:
+            accumulator = FunnelAccumulator(self.details_cap)
+            for funnel in all_funnels:
+                accumulator.add_funnel(funnel)
         
         # Filter by frequency and sort
         filtered_funnels = {}
-        for value, freq in frequency.items():
+        for value, stats in accumulator.stats.items():
+            freq = stats.count
             if freq >= 5:  # Minimum frequency threshold
                 filtered_funnels[value] = {
                     'frequency': freq,
-                    'details': details[value],
+                    'details': accumulator.details(value),
                     'class_mod_16': value % 16,
                     'class_mod_8': value % 8,
                     'is_power_of_2': self.is_power_of_two(value)
@@ -113,19 +257,39 @@ class FunnelIdentifier:
         return dict(sorted(filtered_funnels.items(), 
                          key=lambda x: -x[1]['frequency']))
     
+    @timed_stage('apply_basin_sizes')
+    def apply_basin_sizes(self, funnels, limit, max_value=None, max_height=None):
+        """Add the basin size below limit to each funnel as 'exact_frequency'
+        
+        Sampled 'frequency' counts sampled trajectories through a value; the
+        inverse-tree BFS counts every n <= limit whose trajectory reaches it
+        while staying at or below max_value (or within max_height steps).
+        One of the two bounds is required; see InverseTree for how large
+        max_value must be for exact sizes.
+        """
+        tree = InverseTree(limit, max_value, max_height)
+        sizes = tree.basin_sizes(funnels.keys())
+        
+        for value, data in funnels.items():
+            data['exact_frequency'] = sizes[value]
+        
+        return funnels
+    
     def is_power_of_two(self, n):
         """Check if number is power of two"""
         return (n & (n - 1)) == 0 and n != 0
     
+    @timed_stage('analyze_mathematical_properties')
     def analyze_mathematical_properties(self, funnels):
         """Analyze mathematical properties of funnels"""
         print("🧮 Analyzing mathematical properties...")
         
         properties = {}
+        factorizations = get_factorizer().factorize_many(funnels)
         
         for value, data in funnels.items():
             prop = {
-                'prime_factors': self.factorize(value),
+                'prime_factors': factorizations[value],
                 'bit_length': value.bit_length(),
                 'is_even': value % 2 == 0,
                 'binary_representation': bin(value)[2:],
@@ -139,21 +303,22 @@ class FunnelIdentifier:
         return properties
     
     def factorize(self, n):
-        """Simple prime factorization"""
-        if n < 2:
-            return []
-            
-        factors = []
-        d = 2
-        temp = n
-        
-        while d * d <= temp:
-            while temp % d == 0:
-                factors.append(d)
-                temp //= d
-            d += 1
-            
-        if temp > 1:
-            factors.append(temp)
-            
-        return factors
\ No newline at end of file
+        """Prime factorization (sieve, Miller-Rabin and Pollard-rho, memoized)"""
+        return get_factorizer().factorize(n)
+
+
+def _peak_growths(values):
+    """value / previous for local maxima, whose previous value is (value - 1) / 3"""
+    if values.dtype != object and (values.size == 0 or values.max() <= 2**53):
+        # Both operands are exact in float64, so this matches int / int
+        return values.astype(np.float64) / ((values - 1) // 3).astype(np.float64)
+    return np.array([v / ((v - 1) // 3) for v in values.tolist()], dtype=np.float64)
+
+
+def _sample_shard(task):
+    """Process-pool entry point for one sampling shard; returns (accumulator, counters)"""
+    cls, start, end, max_range, details_cap, instrument = task
+    stats = PipelineStats() if instrument else None
+    identifier = FunnelIdentifier(details_cap=details_cap, stats=stats)
+    accumulator = identifier.accumulate_modular_class(cls, max_range, end - start, start)
+    return accumulator, dict(stats.counters) if stats is not None else {}
@@ -1,8 +1,27 @@
 """
 Visualization package for Collatz fractal structure research
+
+The plotters are imported on first access, so importing the package (or
+anything next to it) does not load matplotlib and networkx.
 """
 
-from .graph_plotter import CollatzGraphPlotter
-from .fractal_mapper import FractalMapper
+import importlib
+
+_LAZY = {
+    'CollatzGraphPlotter': '.graph_plotter',
+    'FractalMapper': '.fractal_mapper',
+}
+
+__all__ = ['CollatzGraphPlotter', 'FractalMapper']
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ['CollatzGraphPlotter', 'FractalMapper']
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
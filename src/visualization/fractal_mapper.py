@@ -8,6 +8,15 @@ import numpy as np
 from matplotlib.colors import LinearSegmentedColormap, Normalize
 import matplotlib.patches as patches
 
+if __package__ in (None, ""):
+    # Run directly as a script: resolve the relative imports from the project root
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    __package__ = "src.visualization"
+
+from ..core.modular_stats import ModularStats
+
 class FractalMapper:
     def __init__(self):
         self.fig_size = (14, 10)
@@ -148,8 +157,7 @@ class FractalMapper:
             fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
         
             # Extraer datos modulares
-            mod_classes = [embudo['valor'] % 16 for embudo in embudos_data]
-            mod_counts = {cls: mod_classes.count(cls) for cls in set(mod_classes)}
+            mod_counts = ModularStats([embudo['valor'] for embudo in embudos_data]).distribution(16)
         
             # Gráfico 1: Distribución modular básica
             classes = sorted(mod_counts.keys())
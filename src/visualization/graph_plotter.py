@@ -7,16 +7,30 @@ import matplotlib.cm as cm
 from matplotlib.colors import Normalize
 import networkx as nx
 import numpy as np
-from collections import defaultdict
 import json
 
+if __package__ in (None, ""):
+    # Run directly as a script: resolve the relative imports from the project root
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    __package__ = "src.visualization"
+
+from ..core.modular_stats import ModularStats
+
 class CollatzGraphPlotter:
     def __init__(self):
         self.fig_size = (12, 8)
         self.colors = cm.Set3(np.linspace(0, 1, 12)) #type: ignore
         
     def plot_embudo_network(self, embudos, conexiones, filename=None):
-        """Plot the embudo network as a directed graph"""
+        """Plot the embudo network as a directed graph
+
+        The nodes are the few dozen embudos, joined by multi-step
+        connections, and most of them lie above any practical CollatzGraph
+        range. The graph is therefore built directly. plot_tree_neighbourhood
+        covers single-step neighbourhoods of large ranges.
+        """
         print("=== Plotting embudo network... ===")
         
         # Create directed graph
@@ -86,16 +100,54 @@ class CollatzGraphPlotter:
         
         plt.show()
         return G, pos
-    
+
+    def plot_tree_neighbourhood(self, grafo, raiz, max_depth=8, max_nodes=300, filename=None):
+        """Plot the predecessors of raiz from a CollatzGraph store
+
+        Only the drawn nodes are exported to networkx, so the store can
+        cover millions of values.
+        """
+        print(f"=== Plotting predecessor tree of {raiz}... ===")
+
+        nodos = grafo.ancestors(raiz, max_depth=max_depth, max_nodes=max_nodes)
+        G = grafo.to_networkx(nodos)
+
+        fig, ax = plt.subplots(figsize=self.fig_size)
+
+        pos = nx.spring_layout(G, k=1.5 / np.sqrt(max(len(G), 1)), iterations=50, seed=0)
+
+        # Merge points (two predecessors in range) are drawn larger
+        node_sizes = [120 if G.nodes[n].get('in_degree', 0) >= 2 else 40 for n in G.nodes()]
+        node_colors = [G.nodes[n].get('depth', 0) for n in G.nodes()]
+
+        nx.draw_networkx_nodes(G, pos,
+                               node_size=node_sizes,
+                               node_color=node_colors,
+                               cmap=cm.viridis, #type: ignore
+                               alpha=0.8,
+                               ax=ax)
+        nx.draw_networkx_edges(G, pos, edge_color='gray', arrows=True,
+                               arrowsize=8, alpha=0.5, ax=ax)
+        nx.draw_networkx_labels(G, pos, {raiz: str(raiz)}, font_size=9, ax=ax)
+
+        ax.set_title(f"Collatz Predecessor Tree of {raiz}\n"
+                     f"({len(G)} nodes, Color = depth to 1, Large = merge point)",
+                     fontsize=14, pad=20)
+        ax.axis('off')
+
+        if filename:
+            plt.savefig(filename, dpi=300, bbox_inches='tight')
+            print(f"*** Tree plot saved as {filename} ***")
+
+        plt.show()
+        return G, pos
+
     def plot_modular_distribution(self, embudos, filename=None):
         """Plot modular distribution of embudos"""
         print("=== Plotting modular distribution... ===")
         
         # Calculate modular distribution
-        mod_dist = defaultdict(int)
-        for embudo in embudos:
-            mod_class = embudo % 16
-            mod_dist[mod_class] += 1
+        mod_dist = ModularStats(embudos).distribution(16)
         
         # Prepare data for plotting
         classes = sorted(mod_dist.keys())
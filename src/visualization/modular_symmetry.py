@@ -1,32 +1,30 @@
 # src/visualization/modular_symmetry.py
 import matplotlib.pyplot as plt
 import numpy as np
-import json
+
+if __package__ in (None, ""):
+    # Run directly as a script: resolve the relative imports from the project root
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    __package__ = "src.visualization"
+
+from ..core.modular_stats import ModularStats
+from ..core.results_store import load_funnels
 
 def plot_modular_symmetry(filename="results/visualizations/modular_symmetry.png"):
     """Plot algebraic symmetries in modular distribution"""
     try:
         print("=== Plotting modular symmetry... ===")
         
-        # Load funnel data
-        with open('results/embudos_identificados.json', 'r') as f:
-            data = json.load(f)
-        
-        # Extract funnel values from the correct structure
-        funnel_values = []
-        for embudo_str in data['embudos'].keys():
-            try:
-                funnel_values.append(int(embudo_str))
-            except ValueError:
-                continue
+        # Load funnel data (columnar results directory, else the JSON export)
+        funnel_values, _ = load_funnels('results/embudos_identificados')
         
         print(f"Processing {len(funnel_values)} funnel values for modular analysis")
         
         # Calculate modular distribution (mod 16)
-        mod_classes = [val % 16 for val in funnel_values]
-        mod_counts = {}
-        for cls in range(16):
-            mod_counts[cls] = mod_classes.count(cls)
+        histogram = ModularStats(funnel_values).histogram(16)
+        mod_counts = {cls: int(histogram[cls]) for cls in range(16)}
         
         print(f"Modular distribution: {mod_counts}")
         
@@ -164,20 +162,19 @@ def plot_modular_symmetry(filename="results/visualizations/modular_symmetry.png"
 
 def analyze_modular_properties(funnel_values):
     """Additional analysis of modular properties"""
-    mod_classes = [val % 16 for val in funnel_values]
+    stats = ModularStats(funnel_values)
+    mod_counts = stats.distribution(16)
+    examples = stats.exemplars(16, count=3)
     
     print("\n=== DETAILED MODULAR ANALYSIS ===")
-    for cls in range(16):
-        count = mod_classes.count(cls)
-        if count > 0:
-            examples = [val for val in funnel_values if val % 16 == cls][:3]
-            print(f"Class {cls:2d}: {count:2d} funnels - Examples: {examples}")
+    for cls, count in mod_counts.items():
+        print(f"Class {cls:2d}: {count:2d} funnels - Examples: {examples[cls]}")
     
     # Check for mathematical patterns
     print("\n=== MATHEMATICAL PATTERNS ===")
     for divisor in [2, 4, 8]:
-        divisible_count = sum(1 for val in funnel_values if val % divisor == 0)
-        percentage = (divisible_count / len(funnel_values)) * 100
+        divisible_count = stats.divisible_count(divisor)
+        percentage = (divisible_count / len(stats)) * 100
         print(f"Divisible by {divisor}: {divisible_count}/{len(funnel_values)} ({percentage:.1f}%)")
 
 if __name__ == "__main__":
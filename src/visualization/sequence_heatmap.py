@@ -1,31 +1,26 @@
 # src/visualization/sequence_heatmap.py
 import matplotlib.pyplot as plt
 import numpy as np
-import json
 from collections import defaultdict
 
+if __package__ in (None, ""):
+    # Run directly as a script: resolve the relative imports from the project root
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    __package__ = "src.visualization"
+
+from ..core.results_store import load_funnels
+
 def plot_sequence_heatmap(filename="results/visualizations/sequence_heatmap.png"):
     """Create heatmap of sequence trajectory density"""
     try:
         print("=== Generating sequence heatmap... ===")
         
-        # Load funnel data
-        with open('results/indentified_funnels.json', 'r') as f:
-            data = json.load(f)
-        
-        print(f"Data structure identified: embudos dict with {len(data['embudos'])} items")
-        
-        # Extraer valores de embudos - estructura CORRECTA
-        funnel_values = []
-        frequencies = []
-        
-        for embudo_str, freq in data['embudos'].items():
-            try:
-                embudo_val = int(embudo_str)
-                funnel_values.append(embudo_val)
-                frequencies.append(freq)
-            except ValueError:
-                continue
+        # Load funnel data (columnar results directory, else the JSON export)
+        valores, cuentas = load_funnels('results/indentified_funnels')
+        funnel_values = valores.tolist()
+        frequencies = cuentas.tolist()
         
         print(f"Extracted {len(funnel_values)} funnel values: {funnel_values[:10]}...")
         print(f"Frequencies: {frequencies[:10]}...")
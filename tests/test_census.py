@@ -0,0 +1,60 @@
+"""
+Tests for the chunked funnel census and its extension to a larger max_n
+"""
+import os
+import sys
+from collections import Counter
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.census import FunnelCensus
+
+
+def censo_directo(max_n, factor=10):
+    """Local maxima above factor * n over every odd n <= max_n"""
+    embudos = Counter()
+    for n in range(1, max_n + 1, 2):
+        secuencia = [n]
+        while secuencia[-1] != 1:
+            m = secuencia[-1]
+            secuencia.append(m // 2 if m % 2 == 0 else 3 * m + 1)
+        for anterior, valor, siguiente in zip(secuencia, secuencia[1:], secuencia[2:]):
+            if anterior < valor > siguiente and valor > factor * n:
+                embudos[valor] += 1
+    return embudos
+
+
+def test_census_matches_a_direct_count(tmp_path):
+    censo = FunnelCensus(3000, str(tmp_path), chunk_size=1000).run()
+    assert censo.embudos(top=None) == censo_directo(3000)
+
+
+def test_extended_census_only_walks_the_new_range(tmp_path):
+    directorio = str(tmp_path)
+    FunnelCensus(3000, directorio, chunk_size=1000).run()
+    antes = {i: os.path.getmtime(FunnelCensus(3000, directorio, chunk_size=1000).chunk_path(i))
+             for i in range(3)}
+
+    # 4500 adds chunk 3 and a partial chunk 4
+    censo = FunnelCensus(4500, directorio, chunk_size=1000)
+    assert censo.pending_chunks() == [3, 4]
+    censo.run()
+    assert censo.embudos(top=None) == censo_directo(4500)
+
+    # 5000 completes chunk 4, which has to be walked again
+    censo = FunnelCensus(5000, directorio, chunk_size=1000)
+    assert censo.pending_chunks() == [4]
+    censo.run()
+    assert censo.embudos(top=None) == censo_directo(5000)
+    assert all(os.path.getmtime(censo.chunk_path(i)) == antes[i] for i in range(3))
+
+
+def test_merge_reports_unfinished_chunks(tmp_path):
+    censo = FunnelCensus(3000, str(tmp_path), chunk_size=1000)
+    censo.process_chunk(0)
+    censo.process_chunk(2)
+    valores, cuentas = censo.merge()
+    parcial = censo_directo(3000) - censo_directo(2000) + censo_directo(1000)
+    assert dict(zip(valores.tolist(), cuentas.tolist())) == dict(parcial)
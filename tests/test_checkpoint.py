@@ -0,0 +1,69 @@
+"""
+Tests for resuming and extending checkpointed sampling runs
+"""
+import os
+import sys
+
+import pytest
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.funnel_identifier import FunnelIdentifier
+
+MAX_RANGE = 20000
+ACUMULAR = FunnelIdentifier.accumulate_modular_class
+
+
+class Interrumpido(Exception):
+    """Stands in for a crash or a killed process"""
+
+
+def registrar_clases(monkeypatch, cortar_en=None):
+    """Record the (class, start) of every shard walked; raise on class cortar_en"""
+    caminados = []
+
+    def acumular(self, cls, max_range, samples, start=0, accumulator=None):
+        if cls == cortar_en:
+            raise Interrumpido()
+        caminados.append((cls, start))
+        return ACUMULAR(self, cls, max_range, samples, start, accumulator)
+
+    monkeypatch.setattr(FunnelIdentifier, 'accumulate_modular_class', acumular)
+    return caminados
+
+
+def identificar(muestra, archivo=None):
+    identifier = FunnelIdentifier(details_cap=3)
+    return identifier.identify_funnels_advanced(MAX_RANGE, muestra, checkpoint=archivo,
+                                                checkpoint_interval=0)
+
+
+def test_resumed_run_matches_an_uninterrupted_one(tmp_path, monkeypatch):
+    esperado = identificar(800)
+    archivo = str(tmp_path / 'embudos.ckpt')
+
+    registrar_clases(monkeypatch, cortar_en=9)
+    with pytest.raises(Interrumpido):
+        identificar(800, archivo)
+    assert os.path.exists(archivo)
+
+    # Only the classes after the interruption are walked again
+    caminados = registrar_clases(monkeypatch)
+    assert identificar(800, archivo) == esperado
+    assert caminados == [(9, 0), (11, 0), (13, 0), (15, 0)]
+
+
+def test_larger_sample_only_walks_the_new_indices(tmp_path, monkeypatch):
+    esperado = identificar(800)
+    archivo = str(tmp_path / 'embudos.ckpt')
+    identificar(400, archivo)
+
+    caminados = registrar_clases(monkeypatch)
+    assert identificar(800, archivo) == esperado
+    assert caminados == [(cls, 50) for cls in range(1, 16, 2)]
+
+    # A smaller sample than the checkpoint covers is refused
+    with pytest.raises(ValueError):
+        identificar(400, archivo)
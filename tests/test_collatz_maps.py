@@ -0,0 +1,34 @@
+"""
+Tests for the Collatz map variants on the batch engine
+"""
+import os
+import sys
+
+import numpy as np
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.batch_engine import BatchTrajectoryEngine
+from src.core.collatz_maps import VARIANTS, trailing_zeros
+
+# Odd, above (2**64 - 2) // 3: its 3n+1 wraps to 0 in uint64
+DESBORDE_A_CERO = 6148914691236517205
+
+
+def test_trailing_zeros_handles_zero_lanes():
+    valores = np.array([0, 1, 12, 2**63], dtype=np.uint64)
+    assert trailing_zeros(valores).tolist() == [64, 0, 2, 63]
+
+
+def test_overflowing_starts_match_across_variants():
+    # 2 * DESBORDE_A_CERO = 2 mod 4 passes the same odd value under T*
+    inicios = [DESBORDE_A_CERO, 2 * DESBORDE_A_CERO, 27]
+    esperado = BatchTrajectoryEngine().run(inicios)
+    for variant in VARIANTS:
+        resultado = BatchTrajectoryEngine(variant=variant).run(inicios)
+        assert resultado['steps'].tolist() == esperado['steps'].tolist()
+        assert resultado['peaks'].tolist() == esperado['peaks'].tolist()
+        assert ([v.tolist() for v in resultado['maxima_values']]
+                == [v.tolist() for v in esperado['maxima_values']])
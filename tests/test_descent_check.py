@@ -0,0 +1,75 @@
+"""
+Tests for the first-descent times and block summaries of the descent check
+"""
+import os
+import sys
+
+import numpy as np
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.descent_check import (DescentBoundCheck, check_descent_block, descent_bound,
+                                    first_descent_times)
+
+
+def descenso_directo(n):
+    x, pasos = n, 0
+    while x >= n:
+        x = 3 * x + 1 if x % 2 else x // 2
+        pasos += 1
+    return pasos
+
+
+def resumen_directo(lo, hi):
+    """Worst f(n)/bound and longest descent over lo..hi, smallest n on ties"""
+    resumen = {'worst_ratio': 0.0, 'worst_n': None, 'max_steps': 0, 'max_steps_n': None}
+    for n in range(lo, hi + 1):
+        f = descenso_directo(n)
+        razon = f / descent_bound(n)
+        if razon > resumen['worst_ratio']:
+            resumen['worst_ratio'], resumen['worst_n'] = razon, n
+        if f > resumen['max_steps']:
+            resumen['max_steps'], resumen['max_steps_n'] = f, n
+    return resumen
+
+
+def test_first_descent_times_match_a_direct_walk():
+    inicios = list(range(3, 20001, 2))
+    assert first_descent_times(inicios).tolist() == [descenso_directo(n) for n in inicios]
+
+
+def test_lanes_that_overflow_uint64_finish_exactly():
+    # 2^64 - 1 and 2^63 + 1 climb past the uint64 range before descending
+    inicios = [2**64 - 1, 2**63 + 1, 2**62 + 27, 27]
+    assert first_descent_times(inicios).tolist() == [descenso_directo(n) for n in inicios]
+
+
+def test_block_summary_matches_a_direct_walk():
+    for lo, hi in ((2, 5000), (1001, 3000), (7, 7)):
+        resumen = check_descent_block(lo, hi)
+        esperado = resumen_directo(lo, hi)
+        assert resumen['checked'] == hi - lo + 1
+        assert resumen['counterexamples'] == 0
+        assert resumen['first_counterexample'] is None
+        assert resumen['worst_n'] == esperado['worst_n']
+        assert np.isclose(resumen['worst_ratio'], esperado['worst_ratio'])
+        assert (resumen['max_steps'], resumen['max_steps_n']) == (
+            esperado['max_steps'], esperado['max_steps_n'])
+
+
+def test_run_folds_the_block_summaries(tmp_path):
+    archivo = str(tmp_path / 'descent.jsonl')
+    total = DescentBoundCheck(20000, archivo, block_size=3000).run()
+    esperado = resumen_directo(2, 20000)
+    assert total['blocks'] == 7
+    assert total['checked'] == 19999
+    assert total['counterexamples'] == 0
+    assert (total['max_steps'], total['max_steps_n']) == (
+        esperado['max_steps'], esperado['max_steps_n'])
+    assert total['worst_n'] == esperado['worst_n']
+
+    # A rerun finds every block in the file and walks nothing
+    assert DescentBoundCheck(20000, archivo, block_size=3000).run() == total
+    assert len(DescentBoundCheck(20000, archivo).summaries()) == 7
@@ -0,0 +1,43 @@
+"""
+Tests for factorization beyond the sieve, up to and past 64-bit values
+"""
+import os
+import sys
+from math import isqrt, prod
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.factorization import Factorizer, is_probable_prime
+
+# Primes around 2^31, 2^32 and 2^33
+PRIMOS = [2147483647, 2147483659, 4294967291, 4294967311, 8589934583, 8589934609]
+
+
+def es_primo_directo(n):
+    return n > 1 and all(n % d for d in range(2, isqrt(n) + 1))
+
+
+def test_primes_are_recognised():
+    assert all(es_primo_directo(p) for p in PRIMOS)
+    assert all(is_probable_prime(p) for p in PRIMOS)
+    # Strong pseudoprime to bases 2, 3, 5 and 7: 3215031751 = 151 * 751 * 28351
+    assert not is_probable_prime(3215031751)
+
+
+def test_semiprimes_above_2_61_split_into_their_primes():
+    factorizador = Factorizer()
+    casos = [(p, q) for i, p in enumerate(PRIMOS) for q in PRIMOS[i:]]
+    for p, q in casos:
+        assert p * q > 2**61
+        assert factorizador.factorize(p * q) == sorted([p, q])
+
+
+def test_mixed_factorizations_multiply_back():
+    factorizador = Factorizer(sieve_limit=1 << 12, trial_limit=100)
+    for factores in ([3, 3, 2147483647, 4294967311], [2] * 30 + [8589934609],
+                     [101, 103, 2147483659, 2147483659], [4294967291] * 2):
+        n = prod(factores)
+        assert n > 2**61
+        assert factorizador.factorize(n) == sorted(factores)
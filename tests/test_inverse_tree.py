@@ -0,0 +1,60 @@
+"""
+Tests for the inverse-tree basin sizes against forward walks
+"""
+import os
+import sys
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.inverse_tree import InverseTree
+
+LIMITE = 3000
+# 40 and 80 lie inside 160's tree, 9232 is the peak of 27, 12292 is above LIMITE
+RAICES = [16, 40, 80, 160, 9232, 12292]
+
+
+def camino_hasta(n, raiz):
+    """Values from n to the first visit of raiz, or None if it stops at 1 first"""
+    camino = [n]
+    while camino[-1] != raiz:
+        if camino[-1] == 1:
+            return None
+        m = camino[-1]
+        camino.append(m // 2 if m % 2 == 0 else 3 * m + 1)
+    return camino
+
+
+def cuenca_directa(raiz, valor_maximo=None, altura_maxima=None):
+    tamano = 0
+    for n in range(1, LIMITE + 1):
+        camino = camino_hasta(n, raiz)
+        if camino is None:
+            continue
+        if valor_maximo is not None and max(camino) > valor_maximo:
+            continue
+        if altura_maxima is not None and len(camino) - 1 > altura_maxima:
+            continue
+        tamano += 1
+    return tamano
+
+
+def test_value_bound_matches_forward_walks():
+    for valor_maximo in (10 * LIMITE, 100000):
+        arbol = InverseTree(LIMITE, valor_maximo=valor_maximo)
+        assert arbol.basin_sizes(RAICES) == {
+            raiz: cuenca_directa(raiz, valor_maximo=valor_maximo) for raiz in RAICES}
+
+
+def test_height_bound_matches_forward_walks():
+    for altura_maxima in (10, 40):
+        arbol = InverseTree(LIMITE, altura_maxima=altura_maxima)
+        assert arbol.basin_sizes(RAICES) == {
+            raiz: cuenca_directa(raiz, altura_maxima=altura_maxima) for raiz in RAICES}
+
+
+def test_single_root_bitmap_matches_its_size():
+    arbol = InverseTree(LIMITE, valor_maximo=10 * LIMITE)
+    assert int(arbol.basin(160).sum()) == arbol.basin_size(160) == cuenca_directa(
+        160, valor_maximo=10 * LIMITE)
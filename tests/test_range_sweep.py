@@ -0,0 +1,37 @@
+"""
+Tests for the sieve-style range sweep against a direct walk
+"""
+import os
+import sys
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.range_sweep import RangeSweep
+
+
+def recorrido_directo(n):
+    pasos, maximo = 0, n
+    while n != 1:
+        n = n // 2 if n % 2 == 0 else 3 * n + 1
+        pasos += 1
+        maximo = max(maximo, n)
+    return pasos, maximo
+
+
+def test_sweep_matches_a_direct_walk_for_each_jump_table():
+    # Starts n = 2^k·h + r only jump once h is large enough: reach past 2^18
+    N = 300000
+    muestra = [*range(1, 3000), *range(2**16, 2**16 + 3000), *range(N - 3000, N + 1)]
+    esperado = [recorrido_directo(n) for n in muestra]
+    for k in (8, 12, 16):
+        tiempos, maximos = RangeSweep(k).run(N)
+        assert list(zip(tiempos[muestra].tolist(), maximos[muestra].tolist())) == esperado
+
+
+def test_extending_a_sweep_only_adds_the_new_values():
+    previos = RangeSweep(12).run(5000)
+    tiempos, maximos = RangeSweep(12).run(9000, previos=previos)
+    assert list(zip(tiempos[1:].tolist(), maximos[1:].tolist())) == [
+        recorrido_directo(n) for n in range(1, 9001)]
@@ -0,0 +1,69 @@
+"""
+Tests for the columnar results store and its JSON round-trip
+"""
+import json
+import os
+import sys
+
+import pytest
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.results_store import ResultsStore, load_funnels
+
+# Ranking order, not value order; 2^64 - 2 needs the full uint64 range
+EMBUDOS = {9232: 186, 7288: 136, 2**64 - 2: 120, 16: 92}
+CONEXIONES = [
+    {'desde': 9232, 'hacia': 4616, 'pasos': 1, 'camino': [9232, 4616]},
+    {'desde': 7288, 'hacia': 16, 'pasos': 3, 'camino': [7288, 3644, 1822, 911]},
+    {'desde': 16, 'hacia': 8, 'pasos': 1},
+]
+
+
+def test_json_round_trip_keeps_every_field(tmp_path):
+    original = ResultsStore.write(str(tmp_path / 'a'), EMBUDOS, CONEXIONES,
+                                  timestamp='2026-01-01T00:00:00')
+    archivo = str(tmp_path / 'a.json')
+    original.to_json(archivo)
+
+    copia = ResultsStore.from_json(archivo, str(tmp_path / 'b'))
+    assert list(copia.embudos().items()) == list(EMBUDOS.items())
+    assert copia.conexiones() == original.conexiones()
+    assert copia.conexiones()[2]['camino'] == [16, 8]
+    assert copia.meta == original.meta
+
+    # Exporting again reproduces the same file
+    archivo_copia = str(tmp_path / 'b.json')
+    copia.to_json(archivo_copia)
+    with open(archivo) as f, open(archivo_copia) as g:
+        assert f.read() == g.read()
+
+
+def test_english_layout_and_json_fallback(tmp_path):
+    datos = {'funnels': {'9232': 186, '4858': 92},
+             'connections': [{'from': 9232, 'to': 4858, 'steps': 7}]}
+    archivo = str(tmp_path / 'embudos.json')
+    with open(archivo, 'w') as f:
+        json.dump(datos, f)
+
+    # Without a store directory, load_funnels reads base + '.json'
+    valores, frecuencias = load_funnels(str(tmp_path / 'embudos'))
+    assert valores.tolist() == [9232, 4858] and frecuencias.tolist() == [186, 92]
+
+    store = ResultsStore.from_json(archivo, str(tmp_path / 'embudos'))
+    assert store.embudos() == {9232: 186, 4858: 92}
+    assert store.conexiones() == [{'desde': 9232, 'hacia': 4858, 'pasos': 7,
+                                   'camino': [9232, 4858]}]
+    valores, frecuencias = load_funnels(str(tmp_path / 'embudos'))
+    assert valores.tolist() == [9232, 4858] and frecuencias.tolist() == [186, 92]
+
+
+def test_values_beyond_uint64_leave_the_old_store(tmp_path):
+    directorio = str(tmp_path / 'a')
+    ResultsStore.write(directorio, EMBUDOS)
+    with pytest.raises(OverflowError):
+        ResultsStore.write(directorio, {2**64: 1})
+    assert ResultsStore(directorio).embudos() == EMBUDOS
+    assert sorted(os.listdir(tmp_path)) == ['a']
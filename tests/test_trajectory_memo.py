@@ -0,0 +1,85 @@
+"""
+Tests for the shared trajectory memo's sequence splicing
+"""
+import os
+import sys
+
+# Agregar el directorio padre al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.collatz_analyzer import CollatzInvestigator
+from src.core.investigator import CollatzInvestigator as CoreInvestigator
+from src.core.trajectory_memo import TrajectoryMemo, collatz_step
+from src.funnel_identifier import FunnelIdentifier
+
+
+def secuencia_directa(n, max_pasos=1000):
+    secuencia = [n]
+    while secuencia[-1] != 1 and len(secuencia) <= max_pasos:
+        secuencia.append(collatz_step(secuencia[-1]))
+    return secuencia
+
+
+class PasosContados:
+    """Standard step that counts its calls"""
+
+    def __init__(self):
+        self.llamadas = 0
+
+    def __call__(self, n):
+        self.llamadas += 1
+        return collatz_step(n)
+
+
+def test_repeated_sequence_does_no_steps():
+    memo = TrajectoryMemo()
+    paso = PasosContados()
+
+    primera = memo.sequence(27, paso)
+    assert primera == secuencia_directa(27)
+    assert paso.llamadas == len(primera) - 1
+
+    paso.llamadas = 0
+    assert memo.sequence(27, paso) == primera
+    assert paso.llamadas == 0
+
+
+def test_overlapping_sequence_steps_only_to_the_merge():
+    memo = TrajectoryMemo()
+    paso = PasosContados()
+    memo.sequence(27, paso)
+
+    # 54 -> 27 joins the stored trajectory after one step
+    paso.llamadas = 0
+    assert memo.sequence(54, paso) == secuencia_directa(54)
+    assert paso.llamadas == 1
+
+    # 29 joins 27's trajectory at 40 after 10 steps
+    paso.llamadas = 0
+    assert memo.sequence(29, paso) == secuencia_directa(29)
+    assert paso.llamadas == 10
+
+
+def test_spliced_sequences_match_a_direct_walk():
+    memo = TrajectoryMemo(max_bytes=50_000)
+    for n in range(2, 3000):
+        for max_pasos in (5, 40, 1000):
+            assert memo.sequence(n, max_steps=max_pasos) == secuencia_directa(n, max_pasos)
+
+
+def test_generators_reuse_the_memo():
+    memo = TrajectoryMemo()
+    CollatzInvestigator(memo=memo).generar_secuencia(27)
+
+    class Contado(CoreInvestigator):
+        llamadas = 0
+
+        def step(self, n):
+            Contado.llamadas += 1
+            return super().step(n)
+
+    assert Contado(memo=memo).sequence(27) == secuencia_directa(27)
+    assert Contado.llamadas == 0
+    assert FunnelIdentifier(memo=memo).generate_detailed_sequence(54) == secuencia_directa(54)
+    assert memo.hits >= 2